@@ -8,26 +8,106 @@ import subprocess
 import requests
 import sys
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from importlib.metadata import PackageNotFoundError, version as metadata_version
+from pathlib import Path
+from types import MappingProxyType
 from packaging import version
+from packaging.utils import parse_sdist_filename, parse_wheel_filename
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import argparse
 
+# PyPI接口
+PYPI_SIMPLE_URL = 'https://pypi.org/simple/czsc/'
+PYPI_SIMPLE_JSON = 'application/vnd.pypi.simple.v1+json'
+PYPI_JSON_URL = 'https://pypi.org/pypi/czsc/json'
+
+# HTTP响应缓存目录，1小时内重复检查不再访问网络
+HTTP_CACHE_PATH = Path.home() / '.cache' / 'moyan' / 'http'
+HTTP_CACHE_EXPIRE = 3600
+
+def _create_session():
+    """创建共享HTTP会话（安装requests_cache时启用带条件请求的磁盘缓存）"""
+    try:
+        import requests_cache
+        HTTP_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        session = requests_cache.CachedSession(
+            str(HTTP_CACHE_PATH),
+            backend='sqlite',
+            expire_after=HTTP_CACHE_EXPIRE,
+            cache_control=True,
+            stale_if_error=True
+        )
+    except ImportError:
+        # requests_cache 属于可选依赖（pip install moyan[enhanced]），未安装时每次检查都会联网
+        session = requests.Session()
+    
+    # PyPI与GitHub请求复用连接池，避免每次请求重新握手TLS
+    session.mount('https://', HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=4,
+        max_retries=Retry(total=2, backoff_factor=0.3)
+    ))
+    session.headers.update({
+        'Accept-Encoding': 'gzip',
+        'User-Agent': 'moyan-check-updates',
+    })
+    return session
+
+_SESSION = _create_session()
+
+# 后台线程池：PyPI与GitHub请求互不依赖，并行发起以重叠网络延迟
+_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
 def get_installed_version():
     """获取当前安装的CZSC版本"""
+    # 直接读取已安装包的元数据，无需启动pip子进程
     try:
-        result = subprocess.run(['pip', 'show', 'czsc'], 
-                              capture_output=True, text=True, check=True)
-        for line in result.stdout.split('\n'):
-            if line.startswith('Version:'):
-                return line.split()[-1].strip()
-    except subprocess.CalledProcessError:
+        return metadata_version('czsc')
+    except PackageNotFoundError:
         return None
-    return None
+
+def _file_version(filename):
+    """从wheel或sdist文件名解析版本号，无法识别时返回None"""
+    try:
+        if filename.endswith('.whl'):
+            return parse_wheel_filename(filename)[1]
+        return parse_sdist_filename(filename)[1]
+    except ValueError:  # InvalidWheelFilename / InvalidSdistFilename / InvalidVersion
+        return None
+
+def _latest_release(files):
+    """
+    从Simple API的文件列表中选出最新的正式版本
+    
+    versions 列表包含已撤回(yanked)的版本，因此按文件判断：某版本的文件全部被撤回时跳过该版本
+    """
+    yanked_by_version = {}
+    for file in files:
+        parsed = _file_version(file.get('filename', ''))
+        if parsed is None or parsed.is_prerelease:
+            continue
+        yanked = bool(file.get('yanked'))
+        yanked_by_version[parsed] = yanked_by_version.get(parsed, True) and yanked
+    releases = [ver for ver, all_yanked in yanked_by_version.items() if not all_yanked]
+    return str(max(releases)) if releases else None
 
 def get_latest_version():
     """从PyPI获取最新版本"""
     try:
-        response = requests.get('https://pypi.org/pypi/czsc/json', timeout=10)
+        # 优先使用Simple API的JSON格式 (PEP 691)，只返回文件和版本列表，体积远小于完整元数据
+        response = _SESSION.get(PYPI_SIMPLE_URL, headers={'Accept': PYPI_SIMPLE_JSON}, timeout=10)
+        response.raise_for_status()
+        if response.headers.get('Content-Type', '').startswith(PYPI_SIMPLE_JSON):
+            latest = _latest_release(response.json().get('files', []))
+            if latest:
+                return latest
+        
+        # 镜像不支持JSON格式或文件列表无法解析时，回退到完整元数据接口（info.version 不含撤回版本）
+        response = _SESSION.get(PYPI_JSON_URL, timeout=10)
         response.raise_for_status()
         data = response.json()
         return data['info']['version']
@@ -39,70 +119,82 @@ def get_release_info(tag_name):
     """获取GitHub release信息"""
     try:
         url = f"https://api.github.com/repos/waditu/czsc/releases/tags/v{tag_name}"
-        response = requests.get(url, timeout=10)
+        response = _SESSION.get(url, timeout=10)
         if response.status_code == 200:
             return response.json()
     except requests.RequestException:
         pass
     return None
 
-def compare_versions(current, latest):
-    """比较版本号"""
+@lru_cache(maxsize=128)
+def _vparse(ver):
+    """解析版本号（带缓存，同一版本字符串只解析一次）"""
+    return version.parse(ver)
+
+def _classify_change(v_current, v_latest):
+    """根据已解析的版本号判断变更类型"""
+    # 主版本号变化通常意味着破坏性更新
+    if v_latest.major > v_current.major:
+        return "major"
+    elif v_latest.minor > v_current.minor:
+        return "minor"
+    elif v_latest.micro > v_current.micro:
+        return "patch"
+    else:
+        return "none"
+
+def analyze_versions(current, latest):
+    """比较版本号并判断变更类型，返回 (状态, 变更类型)"""
     try:
-        v_current = version.parse(current)
-        v_latest = version.parse(latest)
-        
-        if v_current < v_latest:
-            return "outdated"
-        elif v_current > v_latest:
-            return "ahead"
-        else:
-            return "latest"
+        v_current = _vparse(current)
+        v_latest = _vparse(latest)
     except Exception:
-        return "unknown"
+        return "unknown", "unknown"
+    
+    if v_current < v_latest:
+        status = "outdated"
+    elif v_current > v_latest:
+        status = "ahead"
+    else:
+        status = "latest"
+    return status, _classify_change(v_current, v_latest)
+
+def compare_versions(current, latest):
+    """比较版本号"""
+    return analyze_versions(current, latest)[0]
 
 def check_breaking_changes(current_ver, latest_ver):
     """检查是否有破坏性更新"""
-    try:
-        v_current = version.parse(current_ver)
-        v_latest = version.parse(latest_ver)
-        
-        # 主版本号变化通常意味着破坏性更新
-        if v_latest.major > v_current.major:
-            return "major"
-        elif v_latest.minor > v_current.minor:
-            return "minor"
-        elif v_latest.micro > v_current.micro:
-            return "patch"
-        else:
-            return "none"
-    except Exception:
-        return "unknown"
+    return analyze_versions(current_ver, latest_ver)[1]
+
+# 更新策略表
+_STRATEGIES = MappingProxyType({
+    "patch": MappingProxyType({
+        "risk": "低",
+        "action": "建议立即更新",
+        "description": "通常是bug修复和小改进"
+    }),
+    "minor": MappingProxyType({
+        "risk": "中等", 
+        "action": "建议测试后更新",
+        "description": "新功能，通常向后兼容"
+    }),
+    "major": MappingProxyType({
+        "risk": "高",
+        "action": "谨慎评估后手动更新", 
+        "description": "可能包含破坏性变更"
+    })
+})
+
+_UNKNOWN_STRATEGY = MappingProxyType({
+    "risk": "未知",
+    "action": "建议查看更新日志",
+    "description": "无法确定变更类型"
+})
 
 def suggest_update_strategy(change_type):
     """建议更新策略"""
-    strategies = {
-        "patch": {
-            "risk": "低",
-            "action": "建议立即更新",
-            "description": "通常是bug修复和小改进"
-        },
-        "minor": {
-            "risk": "中等", 
-            "action": "建议测试后更新",
-            "description": "新功能，通常向后兼容"
-        },
-        "major": {
-            "risk": "高",
-            "action": "谨慎评估后手动更新", 
-            "description": "可能包含破坏性变更"
-        }
-    }
-    return strategies.get(change_type, {
-        "risk": "未知",
-        "action": "建议查看更新日志",
-        "description": "无法确定变更类型"
-    })
+    return _STRATEGIES.get(change_type, _UNKNOWN_STRATEGY)
 
 def run_compatibility_test():
     """运行基本兼容性测试"""
@@ -176,6 +268,10 @@ def main():
     print('🔍 CZSC版本更新检查工具')
     print('=' * 60)
     print(f'🕐 检查时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
+    if hasattr(_SESSION, 'cache'):
+        print(f'💾 HTTP缓存: 已启用 ({HTTP_CACHE_PATH}.sqlite，有效期 {HTTP_CACHE_EXPIRE} 秒)')
+    else:
+        print('🌐 HTTP缓存: 未启用 (安装 requests-cache 后可缓存检查结果)')
     print()
     
     # 如果只是测试
@@ -193,8 +289,9 @@ def main():
     
     # 获取版本信息
     print("📦 正在检查版本信息...")
+    latest_future = _EXECUTOR.submit(get_latest_version)
     current_version = get_installed_version()
-    latest_version = get_latest_version()
+    latest_version = latest_future.result()
     
     if not current_version:
         print("❌ 未检测到已安装的CZSC，请先安装: pip install czsc")
@@ -208,8 +305,13 @@ def main():
     print(f"🚀 最新版本: {latest_version}")
     print()
     
+    # 版本不一致时提前获取release信息，与版本比较分析并行执行
+    release_future = None
+    if current_version != latest_version:
+        release_future = _EXECUTOR.submit(get_release_info, latest_version)
+    
     # 比较版本
-    status = compare_versions(current_version, latest_version)
+    status, change_type = analyze_versions(current_version, latest_version)
     
     if status == "latest":
         print("✅ 您使用的已是最新版本!")
@@ -222,7 +324,6 @@ def main():
         print("🔔 发现新版本可用!")
         
         # 分析更新类型
-        change_type = check_breaking_changes(current_version, latest_version)
         strategy = suggest_update_strategy(change_type)
         
         print(f"📋 更新类型: {change_type.upper()}")
@@ -232,7 +333,7 @@ def main():
         print()
         
         # 获取release信息
-        release_info = get_release_info(latest_version)
+        release_info = release_future.result() if release_future else get_release_info(latest_version)
         if release_info:
             published_date = release_info.get('published_at', '').split('T')[0]
             print(f"📅 发布日期: {published_date}")
@@ -20,14 +20,52 @@ __author__ = "CZSC Community"
 __email__ = "czsc@example.com"
 __license__ = "MIT"
 
-# 导入核心组件
-from .core.analyzer import MoyanAnalyzer
-from .analyzer.auto_analyzer import AutoAnalyzer
-from .config.settings import MoyanConfig
-from .config.kline_config import KLINE_LEVELS, DEFAULT_KLINE_LEVEL
+import importlib
+import importlib.util
+import sys
 
-# 导入工具函数
-from .utils import create_chart, save_chart, generate_report, export_report
+# 延迟导入表: 属性名 -> (模块, 对象名)
+# 首次访问时才导入对应模块，避免 `import moyan` 时加载pandas/matplotlib/czsc等重量级依赖
+_LAZY_IMPORTS = {
+    # 核心组件
+    "MoyanAnalyzer": (".core.analyzer", "MoyanAnalyzer"),
+    "AutoAnalyzer": (".analyzer.auto_analyzer", "AutoAnalyzer"),
+    "MoyanConfig": (".config.settings", "MoyanConfig"),
+    
+    # 配置
+    "KLINE_LEVELS": (".config.kline_config", "KLINE_LEVELS"),
+    "DEFAULT_KLINE_LEVEL": (".config.kline_config", "DEFAULT_KLINE_LEVEL"),
+    
+    # 工具函数
+    "create_chart": (".utils", "create_chart"),
+    "save_chart": (".utils", "save_chart"),
+    "generate_report": (".utils", "generate_report"),
+    "export_report": (".utils", "export_report"),
+}
+
+def __getattr__(name):
+    """按需导入核心组件 (PEP 562)"""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    # 首次使用分析器时检查CZSC依赖
+    if name == "MoyanAnalyzer" and not check_czsc_dependency():
+        import warnings
+        warnings.warn(
+            "CZSC核心库未正确安装，部分功能可能不可用。请运行: pip install czsc>=0.9.8",
+            ImportWarning
+        )
+    
+    module_name, attr_name = _LAZY_IMPORTS[name]
+    module = importlib.import_module(module_name, __package__)
+    value = getattr(module, attr_name)
+    
+    # 缓存到模块命名空间，后续访问不再经过 __getattr__
+    setattr(sys.modules[__name__], name, value)
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
 
 __all__ = [
     # 版本信息
@@ -60,6 +98,15 @@ def welcome():
     print(f"📊 版本: {__version__}")
     print(f"👥 作者: {__author__}")
     print(f"📄 许可: {__license__}")
+    if check_czsc_dependency():
+        from importlib.metadata import PackageNotFoundError, version
+        try:
+            czsc_version = version("czsc")
+        except PackageNotFoundError:
+            czsc_version = "unknown"
+        print(f"✅ CZSC核心库已安装: v{czsc_version}")
+    else:
+        print("❌ CZSC核心库未安装，请运行: pip install czsc>=0.9.8")
     print()
     print("✨ 核心功能:")
     print("  🎯 缠论技术分析 (基于CZSC核心库)")
@@ -78,21 +125,5 @@ def welcome():
 
 # 检查CZSC依赖
 def check_czsc_dependency():
-    """检查CZSC库依赖"""
-    try:
-        import czsc
-        czsc_version = getattr(czsc, '__version__', 'unknown')
-        print(f"✅ CZSC核心库已加载: v{czsc_version}")
-        return True
-    except ImportError as e:
-        print(f"❌ CZSC核心库未安装: {e}")
-        print("请运行: pip install czsc>=0.9.8")
-        return False
-
-# 自动检查依赖
-if not check_czsc_dependency():
-    import warnings
-    warnings.warn(
-        "CZSC核心库未正确安装，部分功能可能不可用。请运行: pip install czsc>=0.9.8",
-        ImportWarning
-    )
+    """检查CZSC库依赖（仅查找模块，不执行导入）"""
+    return importlib.util.find_spec("czsc") is not None
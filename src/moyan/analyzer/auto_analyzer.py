@@ -10,23 +10,106 @@
 创建时间：2025-09-28
 """
 
-import yfinance as yf
 import czsc
 import pandas as pd
 import numpy as np
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from datetime import datetime, timedelta
+from numpy.lib.stride_tricks import sliding_window_view
+from datetime import datetime, timedelta, time as dt_time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import hashlib
+import heapq
+import itertools
 import warnings
 import os
+import shutil
+import subprocess
 warnings.filterwarnings('ignore')
 
 # 导入配置
 from ..config.kline_config import KLINE_LEVELS, DEFAULT_KLINE_LEVEL, get_kline_config
 from ..config.settings import default_config
 
+@lru_cache(maxsize=1)
+def _init_matplotlib():
+    """
+    首次绘图时才导入matplotlib，选择无界面的Agg后端并统一设置绘图参数
+    
+    matplotlib和yfinance一样导入较慢，只做数据分析或不出图时不必加载；每个进程只执行一次
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    matplotlib.rcParams.update({
+        # 中文字体
+        'font.sans-serif': ['Arial Unicode MS', 'SimHei', 'DejaVu Sans'],
+        'axes.unicode_minus': False,
+        # Mac高DPI显示器优化设置
+        'figure.dpi': 200,        # 高DPI显示
+        'savefig.dpi': default_config.chart.save_dpi,  # 保存分辨率
+        'font.size': 10,          # 适合高DPI的字体大小
+        'axes.linewidth': 1.2,    # 稍粗的坐标轴线
+        'lines.linewidth': 1.5,   # 稍粗的线条
+    })
+
+# 分析所需的行情数据列
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# 分型/笔字段数组的结构：每次缠论分析后一次性填充，各项分析和绘图直接按字段读取
+FX_DTYPE = np.dtype([('dt', 'datetime64[ns]'), ('fx', 'f8'), ('is_top', '?')])
+BI_DTYPE = np.dtype([('a_dt', 'datetime64[ns]'), ('b_dt', 'datetime64[ns]'),
+                     ('a', 'f8'), ('b', 'f8'), ('up', '?')])
+
+# 缠论计算结果的进程内缓存：{(symbol, K线级别, 行情数据哈希): 计算结果}
+# 注意：该缓存只在同一进程内有效（Web服务、批量分析），不会落盘。CZSC对象是原生扩展类型，
+# 无法pickle；CLI每次运行都是新进程，跨运行复用的只有 _load_stock_data 的行情parquet缓存
+_ANALYSIS_CACHE = OrderedDict()
+_ANALYSIS_CACHE_SIZE = 16
+_CACHED_RESULT_KEYS = ('fractals', 'strokes', 'segments', 'pivots', 'divergences', 'buy_points', 'sell_points')
+
+# A股收盘时间，晚于收盘时间写入的缓存才包含当日完整数据
+MARKET_CLOSE_TIME = dt_time(15, 0)
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+def _ema_recursive(values, span):
+    """
+    指数移动平均，结果与 pandas 的 ewm(span=span).mean() 一致
+    
+    按递推 num[i] = x[i] + beta * num[i-1]、den[i] = 1 + beta * den[i-1] 计算，
+    安装numba时编译为本地代码
+    """
+    beta = 1.0 - 2.0 / (span + 1)
+    result = np.empty(len(values), dtype=np.float64)
+    num = 0.0
+    den = 0.0
+    for i in range(len(values)):
+        num = values[i] + beta * num
+        den = 1.0 + beta * den
+        result[i] = num / den
+    return result
+
+try:
+    from numba import njit
+    _ema = njit(cache=True)(_ema_recursive)
+except ImportError:
+    # 没有numba时纯Python递推较慢，使用pandas的C实现
+    def _ema(values, span):
+        return pd.Series(values).ewm(span=span).mean().to_numpy()
+
+def _evict_cached_czsc(c):
+    """删除引用了指定CZSC对象的缓存项（该对象即将被增量更新，缓存结果不再对应其内容）"""
+    for key in [key for key, cached in _ANALYSIS_CACHE.items() if cached['c'] is c]:
+        del _ANALYSIS_CACHE[key]
+
+def _fmt_date(ts):
+    """格式化为 YYYY-MM-DD，isoformat切片比strftime快得多，适合报告表格逐行调用"""
+    return ts.isoformat()[:10]
+
 class AutoAnalyzer:
     """缠论自动分析器"""
     
@@ -46,10 +129,26 @@ class AutoAnalyzer:
         self.c = None
         self.analysis_result = {}
         
+        # 增量更新CZSC对象所需的状态：(symbol, K线级别, 首根K线时间) 相同、
+        # 且已送入的K线（末根除外）行数和内容哈希 _czsc_prefix 都未变化才沿用已有对象
+        self._czsc_key = None
+        self._czsc_last_dt = None
+        self._czsc_prefix = None
+        
+        # 分型/笔的字段数组（每次缠论分析后计算一次，供各项分析复用）
+        self._fx_arr = None
+        self._bi_arr = None
+        
         # 文件路径记录
         self.last_chart_path = None
         self.last_report_path = None
         
+        # 本次分析的时间戳（图表和报告共用，保证文件名一致）
+        self._run_timestamp = None
+        
+        # 绘图用的Figure，首次绘图时创建，之后每次分析清空复用
+        self._fig = None
+        
         # Web数据缓存
         self.web_data = {
             'raw_df': None,
@@ -63,6 +162,7 @@ class AutoAnalyzer:
         self.output_base_dir = output_base_dir
         self.charts_dir = os.path.join(output_base_dir, "charts")
         self.reports_dir = os.path.join(output_base_dir, "reports")
+        self.cache_dir = os.path.join(output_base_dir, "_cache")
         
         # 设置K线级别
         self.kline_level = kline_level or DEFAULT_KLINE_LEVEL
@@ -71,19 +171,25 @@ class AutoAnalyzer:
             self.kline_level = DEFAULT_KLINE_LEVEL
         
         self.kline_config = KLINE_LEVELS[self.kline_level]
-        
-        # 设置中文字体
-        plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'SimHei', 'DejaVu Sans']
-        plt.rcParams['axes.unicode_minus'] = False
     
     def _ensure_output_dirs(self):
         """确保输出目录存在"""
         os.makedirs(self.charts_dir, exist_ok=True)
         os.makedirs(self.reports_dir, exist_ok=True)
     
+    def _to_column_major(self):
+        """将行情数据整理为按列连续存储，后续整列读取时无需跨行跳读"""
+        self.df = pd.DataFrame(
+            {col: np.ascontiguousarray(self.df[col].to_numpy())
+             for col in OHLCV_COLUMNS if col in self.df.columns},
+            index=self.df.index
+        )
+    
     def _generate_timestamp(self):
-        """生成时间戳字符串"""
-        return datetime.now().strftime('%Y%m%d_%H%M%S')
+        """生成时间戳字符串（同一次分析内只生成一次）"""
+        if self._run_timestamp is None:
+            self._run_timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return self._run_timestamp
     
     def _get_chart_filename(self):
         """生成图表文件名（带时间戳）"""
@@ -99,30 +205,22 @@ class AutoAnalyzer:
         filename = f"{self.stock_code}_{kline_suffix}_czsc_report_{timestamp}.md"
         return os.path.join(self.reports_dir, filename)
         
-    def get_stock_data(self, stock_code, start_date=None, end_date=None, days=None):
-        """
-        获取股票数据
-        
-        Args:
-            stock_code (str): 6位股票代码
-            start_date (str): 开始日期，格式 'YYYYMMDD' 或 'YYYY-MM-DD'，默认根据K线级别设置
-            end_date (str): 结束日期，格式 'YYYYMMDD' 或 'YYYY-MM-DD'，默认当前日期
-            days (int): 获取天数，当start_date和end_date都未指定时使用，默认根据K线级别设置
-        """
-        self.stock_code = stock_code
-        
-        # 判断股票市场并构造symbol
+    @staticmethod
+    def _resolve_symbol(stock_code):
+        """根据股票代码判断市场并构造yfinance symbol"""
         if stock_code.startswith('6'):
-            self.symbol = f"{stock_code}.SS"  # 上交所
+            return f"{stock_code}.SS"  # 上交所
         elif stock_code.startswith(('0', '3')):
-            self.symbol = f"{stock_code}.SZ"  # 深交所
-        else:
-            raise ValueError(f"不支持的股票代码格式: {stock_code}")
-        
-        print(f"📊 正在获取股票 {stock_code} 的数据...")
-        print(f"📈 K线级别: {self.kline_config['name']} ({self.kline_level})")
+            return f"{stock_code}.SZ"  # 深交所
+        raise ValueError(f"不支持的股票代码格式: {stock_code}")
+    
+    def _resolve_date_range(self, start_date=None, end_date=None, days=None):
+        """
+        处理日期参数，根据K线级别设置默认值
         
-        # 处理日期参数，根据K线级别设置默认值
+        Returns:
+            tuple: (开始日期, 结束日期)，均为 'YYYY-MM-DD' 格式
+        """
         if start_date is None and end_date is None and days is None:
             # 使用K线级别的默认天数
             days = self.kline_config['default_days']
@@ -149,11 +247,20 @@ class AutoAnalyzer:
                 return f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:8]}"
             return date_str  # 已经是 YYYY-MM-DD 格式
         
-        start_date_formatted = format_date(start_date)
-        end_date_formatted = format_date(end_date)
+        return format_date(start_date), format_date(end_date)
+    
+    def _fetch(self, stock_code, start_date, end_date):
+        """
+        从网络获取行情数据（只读取K线级别配置，不修改分析器状态，可在线程池中执行）
         
-        print(f"📅 时间区间: {start_date_formatted} 至 {end_date_formatted}")
+        Args:
+            stock_code (str): 6位股票代码
+            start_date (str): 开始日期，'YYYY-MM-DD' 格式
+            end_date (str): 结束日期，'YYYY-MM-DD' 格式
         
+        Returns:
+            tuple: (DataFrame, 数据源名称)
+        """
         try:
             # 使用新的多数据源系统获取股票数据
             from moyan.core.enhanced_data_source import get_data_source_manager
@@ -164,52 +271,109 @@ class AutoAnalyzer:
             # 获取数据
             data, source_name = data_manager.get_stock_data(
                 stock_code=stock_code,
-                start_date=start_date_formatted,
-                end_date=end_date_formatted,
+                start_date=start_date,
+                end_date=end_date,
                 kline_level=self.kline_level  # 传递K线级别参数
             )
             
             if data is not None and len(data) > 0:
-                self.df = data
                 print(f"✅ 使用 {source_name} 数据源成功获取 {len(data)} 条数据")
-                
-                # 获取股票基本信息，优先使用本地数据库
-                try:
-                    from moyan.config.stock_database import get_stock_info
-                    stock_info = get_stock_info(stock_code)
-                    if stock_info:
-                        self.stock_name = stock_info['name']
-                    else:
-                        # 直接使用股票代码，不再访问yfinance获取名称
-                        self.stock_name = f'股票{stock_code}'
-                except ImportError:
-                    # 没有本地数据库，直接使用股票代码
-                    self.stock_name = f'股票{stock_code}'
-                
-                print(f"✅ 成功获取 {len(self.df)} 条{self.kline_config['name']}数据")
-                print(f"📈 股票名称: {self.stock_name}")
-                print(f"📅 实际数据范围: {self.df.index[0].strftime('%Y-%m-%d %H:%M' if 'm' in self.kline_level else '%Y-%m-%d')} 至 {self.df.index[-1].strftime('%Y-%m-%d %H:%M' if 'm' in self.kline_level else '%Y-%m-%d')}")
-                
-                return True
-            else:
-                raise ValueError("多数据源系统未获取到数据")
+                return data, source_name
+            raise ValueError("多数据源系统未获取到数据")
                 
         except Exception as e:
             print(f"⚠️ 多数据源获取失败，回退到yfinance: {e}")
             
             # 回退到原有的yfinance方式
-            ticker = yf.Ticker(self.symbol)
+            import yfinance as yf
+            ticker = yf.Ticker(self._resolve_symbol(stock_code))
             interval = self.kline_config['yfinance_interval']
             
-            self.df = ticker.history(
-                start=start_date_formatted, 
-                end=end_date_formatted,
+            data = ticker.history(
+                start=start_date, 
+                end=end_date,
                 interval=interval
             )
             
-            if len(self.df) == 0:
+            if len(data) == 0:
                 raise ValueError("未获取到数据")
             
+            return data, 'yfinance'
+    
+    def _get_cache_path(self, stock_code, start_date, end_date):
+        """生成行情缓存文件路径"""
+        return os.path.join(self.cache_dir,
+                            f"{stock_code}_{self.kline_level}_{start_date}_{end_date}.parquet")
+    
+    def _is_cache_fresh(self, cache_path, end_date):
+        """缓存写入时间晚于区间内最近一次收盘时视为有效"""
+        if not os.path.exists(cache_path):
+            return False
+        last_day = min(datetime.strptime(end_date, '%Y-%m-%d').date(), datetime.now().date())
+        last_close = datetime.combine(last_day, MARKET_CLOSE_TIME)
+        return datetime.fromtimestamp(os.path.getmtime(cache_path)) >= last_close
+    
+    def _load_stock_data(self, stock_code, start_date, end_date):
+        """
+        获取行情数据，优先读取本地parquet缓存，未命中时联网获取并写入缓存
+        
+        Returns:
+            tuple: (DataFrame, 数据源名称)
+        """
+        if not PARQUET_AVAILABLE:
+            return self._fetch(stock_code, start_date, end_date)
+        
+        cache_path = self._get_cache_path(stock_code, start_date, end_date)
+        if self._is_cache_fresh(cache_path, end_date):
+            try:
+                data = pd.read_parquet(cache_path)
+                print(f"💾 使用本地缓存数据: {cache_path}")
+                return data, '本地缓存'
+            except Exception as e:
+                print(f"⚠️ 读取缓存失败，重新获取数据: {e}")
+        
+        data, source_name = self._fetch(stock_code, start_date, end_date)
+        
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            data.to_parquet(cache_path, engine='pyarrow', compression='zstd')
+        except Exception as e:
+            print(f"⚠️ 写入缓存失败: {e}")
+        
+        return data, source_name
+    
+    def get_stock_data(self, stock_code, start_date=None, end_date=None, days=None, prefetched=None):
+        """
+        获取股票数据
+        
+        Args:
+            stock_code (str): 6位股票代码
+            start_date (str): 开始日期，格式 'YYYYMMDD' 或 'YYYY-MM-DD'，默认根据K线级别设置
+            end_date (str): 结束日期，格式 'YYYYMMDD' 或 'YYYY-MM-DD'，默认当前日期
+            days (int): 获取天数，当start_date和end_date都未指定时使用，默认根据K线级别设置
+            prefetched (Future): 已提交到线程池的 _load_stock_data 任务，批量分析时传入
+        """
+        self.stock_code = stock_code
+        
+        # 判断股票市场并构造symbol
+        self.symbol = self._resolve_symbol(stock_code)
+        
+        print(f"📊 正在获取股票 {stock_code} 的数据...")
+        print(f"📈 K线级别: {self.kline_config['name']} ({self.kline_level})")
+        
+        start_date_formatted, end_date_formatted = self._resolve_date_range(start_date, end_date, days)
+        
+        print(f"📅 时间区间: {start_date_formatted} 至 {end_date_formatted}")
+        
+        try:
+            if prefetched is not None:
+                data, source_name = prefetched.result()
+            else:
+                data, source_name = self._load_stock_data(stock_code, start_date_formatted, end_date_formatted)
+            
+            self.df = data
+            self._to_column_major()
+            
             # 获取股票基本信息，优先使用本地数据库
             try:
                 from moyan.config.stock_database import get_stock_info
@@ -237,21 +401,35 @@ class AutoAnalyzer:
         """转换为CZSC格式"""
         print("🔄 转换数据格式...")
         
-        self.bars = []
-        for i, (date, row) in enumerate(self.df.iterrows()):
-            bar = czsc.RawBar(
+        # 按列一次性取出数组，避免 iterrows 逐行构造 Series
+        dts = pd.to_datetime(self.df.index)
+        opens = self.df['Open'].to_numpy(dtype=np.float64)
+        highs = self.df['High'].to_numpy(dtype=np.float64)
+        lows = self.df['Low'].to_numpy(dtype=np.float64)
+        closes = self.df['Close'].to_numpy(dtype=np.float64)
+        volumes = self.df['Volume'].to_numpy(dtype=np.float64)
+        vols = volumes.astype(np.int64)
+        # 成交额按四舍五入取整，避免直接截断带来的偏差
+        amounts = np.rint(volumes * closes).astype(np.int64)
+        
+        self.bars = [
+            czsc.RawBar(
                 symbol=self.symbol,
                 id=i,
                 freq=czsc.Freq.D,
-                dt=pd.to_datetime(date),
-                open=row['Open'],
-                close=row['Close'],
-                high=row['High'],
-                low=row['Low'],
-                vol=int(row['Volume']),
-                amount=int(row['Volume'] * row['Close'])
+                dt=dt,
+                open=o,
+                close=c,
+                high=h,
+                low=l,
+                vol=v,
+                amount=a
             )
-            self.bars.append(bar)
+            for i, (dt, o, c, h, l, v, a) in enumerate(zip(
+                dts, opens.tolist(), closes.tolist(), highs.tolist(), lows.tolist(),
+                vols.tolist(), amounts.tolist()
+            ))
+        ]
         
         print(f"✅ 数据格式转换完成: {len(self.bars)} 根K线")
     
@@ -260,8 +438,30 @@ class AutoAnalyzer:
         print("🧮 开始缠论分析...")
         
         try:
-            # 创建CZSC对象
-            self.c = czsc.CZSC(self.bars)
+            # 同一只股票同一级别的数据只是在末尾追加了新K线时，增量更新已有CZSC对象；
+            # 最后一根K线也重新送入，盘中未完成的K线会被替换为最新值
+            key = (self.symbol, self.kline_level, self.bars[0].dt if self.bars else None)
+            if (self.c is not None and hasattr(self.c, 'update') and key == self._czsc_key
+                    and self.c.bars_raw and self.c.bars_raw[-1].dt == self._czsc_last_dt):
+                new_bars = [bar for bar in self.bars if bar.dt >= self._czsc_last_dt]
+                n_prefix = len(self.bars) - len(new_bars)
+            else:
+                new_bars = None
+            # 已送入的历史K线被修正过（如复权、数据源更正）时不能增量更新，只能重建
+            if (new_bars and new_bars[0].dt == self._czsc_last_dt
+                    and (n_prefix, self._bars_prefix_hash(n_prefix)) == self._czsc_prefix):
+                # 对象即将被原地修改，缓存中引用它的旧结果随之失效
+                _evict_cached_czsc(self.c)
+                for bar in new_bars:
+                    self.c.update(bar)
+                print(f"♻️ 增量更新缠论结构: {len(new_bars)} 根K线")
+            else:
+                # 创建CZSC对象
+                self.c = czsc.CZSC(self.bars)
+            self._czsc_key = key
+            self._czsc_last_dt = self.bars[-1].dt
+            self._czsc_prefix = (len(self.bars) - 1, self._bars_prefix_hash(len(self.bars) - 1))
+            self._cache_fx_bi_arrays()
             
             print(f"✅ 缠论分析完成")
             print(f"  📈 原始K线: {len(self.c.bars_raw)} 根")
@@ -285,12 +485,65 @@ class AutoAnalyzer:
             print(f"❌ 缠论分析失败: {e}")
             return False
     
+    def _analysis_cache_key(self):
+        """根据行情数据内容生成缠论计算结果的缓存键"""
+        data_hash = hashlib.sha1(pd.util.hash_pandas_object(self.df, index=True).to_numpy()).hexdigest()
+        return (self.symbol, self.kline_level, data_hash)
+    
+    def _bars_prefix_hash(self, n):
+        """前n根K线对应行情数据的哈希，用于确认增量更新前已送入的K线没有变化"""
+        return hashlib.sha1(pd.util.hash_pandas_object(self.df.iloc[:n], index=True).to_numpy()).hexdigest()
+    
+    def _restore_cached_analysis(self, key):
+        """命中缓存时直接恢复K线、CZSC对象和各项分析结果"""
+        cached = _ANALYSIS_CACHE.get(key)
+        if cached is None:
+            return False
+        _ANALYSIS_CACHE.move_to_end(key)
+        
+        self.bars = cached['bars']
+        self.c = cached['c']
+        self._fx_arr = cached['fx_arr']
+        self._bi_arr = cached['bi_arr']
+        self.analysis_result.update(cached['result'])
+        # 恢复CZSC对象对应的增量状态，之后追加K线仍可走增量更新；
+        # 对象可能被多个分析器共享，czsc_analysis 会先核对对象末根K线再更新
+        self._czsc_key, self._czsc_last_dt, self._czsc_prefix = cached['czsc_state']
+        return True
+    
+    def _store_cached_analysis(self, key):
+        """保存本次缠论计算结果"""
+        _ANALYSIS_CACHE[key] = {
+            'bars': self.bars,
+            'c': self.c,
+            'fx_arr': self._fx_arr,
+            'bi_arr': self._bi_arr,
+            'result': {name: self.analysis_result[name] for name in _CACHED_RESULT_KEYS},
+            'czsc_state': (self._czsc_key, self._czsc_last_dt, self._czsc_prefix),
+        }
+        while len(_ANALYSIS_CACHE) > _ANALYSIS_CACHE_SIZE:
+            _ANALYSIS_CACHE.popitem(last=False)
+    
+    def _cache_fx_bi_arrays(self):
+        """一次遍历取出分型和笔的常用字段，避免各项分析重复读取对象属性和枚举值"""
+        self._fx_arr = np.array(
+            [(fx.dt, fx.fx, fx.mark.value == '顶分型') for fx in self.c.fx_list],
+            dtype=FX_DTYPE
+        )
+        self._bi_arr = np.array(
+            [(bi.fx_a.dt, bi.fx_b.dt, bi.fx_a.fx, bi.fx_b.fx, bi.direction.value == '向上')
+             for bi in self.c.bi_list],
+            dtype=BI_DTYPE
+        )
+    
     def analyze_fractals(self):
         """分析分型"""
         print("🔍 分析分型...")
         
-        top_fx = [fx for fx in self.c.fx_list if fx.mark.value == '顶分型']
-        bottom_fx = [fx for fx in self.c.fx_list if fx.mark.value == '底分型']
+        fx_list = self.c.fx_list
+        is_top = self._fx_arr['is_top']
+        top_fx = [fx_list[i] for i in np.flatnonzero(is_top)]
+        bottom_fx = [fx_list[i] for i in np.flatnonzero(~is_top)]
         
         fractal_analysis = {
             'total_count': len(self.c.fx_list),
@@ -309,29 +562,32 @@ class AutoAnalyzer:
         """分析笔"""
         print("🔍 分析笔...")
         
-        up_strokes = [bi for bi in self.c.bi_list if bi.direction.value == '向上']
-        down_strokes = [bi for bi in self.c.bi_list if bi.direction.value == '向下']
+        bi_list = self.c.bi_list
+        n = len(bi_list)
         
-        # 计算笔的统计信息
-        up_changes = []
-        down_changes = []
+        # 涨跌幅计算基于缓存的起止价格和方向数组，全部向量化
+        start_prices = self._bi_arr['a']
+        end_prices = self._bi_arr['b']
+        is_up = self._bi_arr['up']
+        is_down = ~is_up
         
-        if up_strokes:
-            up_changes = [((bi.fx_b.fx - bi.fx_a.fx) / bi.fx_a.fx) * 100 for bi in up_strokes]
+        up_strokes = [bi for bi, up in zip(bi_list, is_up) if up]
+        down_strokes = [bi for bi, down in zip(bi_list, is_down) if down]
         
-        if down_strokes:
-            down_changes = [((bi.fx_a.fx - bi.fx_b.fx) / bi.fx_a.fx) * 100 for bi in down_strokes]
+        # 计算笔的统计信息
+        up_changes = (end_prices[is_up] - start_prices[is_up]) / start_prices[is_up] * 100
+        down_changes = (start_prices[is_down] - end_prices[is_down]) / start_prices[is_down] * 100
         
         stroke_analysis = {
-            'total_count': len(self.c.bi_list),
+            'total_count': n,
             'up_count': len(up_strokes),
             'down_count': len(down_strokes),
             'up_strokes': up_strokes,
             'down_strokes': down_strokes,
-            'up_avg_change': np.mean(up_changes) if up_changes else 0,
-            'up_max_change': max(up_changes) if up_changes else 0,
-            'down_avg_change': np.mean(down_changes) if down_changes else 0,
-            'down_max_change': max(down_changes) if down_changes else 0,
+            'up_avg_change': up_changes.mean() if up_changes.size else 0,
+            'up_max_change': up_changes.max() if up_changes.size else 0,
+            'down_avg_change': down_changes.mean() if down_changes.size else 0,
+            'down_max_change': down_changes.max() if down_changes.size else 0,
             'latest_stroke': self.c.bi_list[-1] if self.c.bi_list else None
         }
         
@@ -390,37 +646,42 @@ class AutoAnalyzer:
         divergences = []
         
         # 简化的背驰识别：比较相邻同向笔的力度
-        if len(self.c.bi_list) >= 4:
-            for i in range(2, len(self.c.bi_list)):
-                current_bi = self.c.bi_list[i]
-                prev_same_direction = None
+        bi_list = self.c.bi_list
+        if len(bi_list) >= 4:
+            n = len(bi_list)
+            start_prices = self._bi_arr['a']
+            end_prices = self._bi_arr['b']
+            is_up = self._bi_arr['up']
+            
+            # 笔的幅度：向上笔按涨幅计，向下笔按跌幅计
+            changes = np.where(is_up, end_prices - start_prices, start_prices - end_prices) / start_prices
+            
+            # 一次遍历记录每笔之前最近的同方向笔索引，避免逐笔向前回溯
+            prev_same = [-1] * n
+            last_index = {}
+            for i, bi in enumerate(bi_list):
+                prev_same[i] = last_index.get(bi.direction, -1)
+                last_index[bi.direction] = i
+            
+            for i in range(2, n):
+                j = prev_same[i]
+                if j < 0:
+                    continue
                 
-                # 找到前一个同方向的笔
-                for j in range(i-1, -1, -1):
-                    if self.c.bi_list[j].direction == current_bi.direction:
-                        prev_same_direction = self.c.bi_list[j]
-                        break
+                current_change = float(changes[i])
+                prev_change = float(changes[j])
                 
-                if prev_same_direction:
-                    # 计算笔的幅度
-                    if current_bi.direction.value == '向上':
-                        current_change = (current_bi.fx_b.fx - current_bi.fx_a.fx) / current_bi.fx_a.fx
-                        prev_change = (prev_same_direction.fx_b.fx - prev_same_direction.fx_a.fx) / prev_same_direction.fx_a.fx
-                    else:
-                        current_change = (current_bi.fx_a.fx - current_bi.fx_b.fx) / current_bi.fx_a.fx
-                        prev_change = (prev_same_direction.fx_a.fx - prev_same_direction.fx_b.fx) / prev_same_direction.fx_a.fx
-                    
-                    # 判断背驰（当前笔幅度明显小于前一笔）
-                    if current_change < prev_change * 0.7:  # 阈值可调整
-                        divergence_type = "顶背驰" if current_bi.direction.value == '向上' else "底背驰"
-                        divergences.append({
-                            'type': divergence_type,
-                            'current_bi': current_bi,
-                            'prev_bi': prev_same_direction,
-                            'current_change': current_change * 100,
-                            'prev_change': prev_change * 100,
-                            'strength': (prev_change - current_change) / prev_change * 100
-                        })
+                # 判断背驰（当前笔幅度明显小于前一笔）
+                if current_change < prev_change * 0.7:  # 阈值可调整
+                    divergence_type = "顶背驰" if is_up[i] else "底背驰"
+                    divergences.append({
+                        'type': divergence_type,
+                        'current_bi': bi_list[i],
+                        'prev_bi': bi_list[j],
+                        'current_change': current_change * 100,
+                        'prev_change': prev_change * 100,
+                        'strength': (prev_change - current_change) / prev_change * 100
+                    })
         
         self.analysis_result['divergences'] = divergences
         print(f"  ⚠️ 识别背驰: {len(divergences)} 个")
@@ -432,18 +693,21 @@ class AutoAnalyzer:
         buy_points = []
         sell_points = []
         
+        # 分型与背驰点的日期匹配矩阵：相差天数与 timedelta.days 一样向下取整，不超过5天视为背驰确认
+        divergences = self.analysis_result.get('divergences', [])
+        div_dts = np.array([div['current_bi'].fx_b.dt for div in divergences], dtype='datetime64[ns]')
+        div_is_top = np.array([div['type'] == '顶背驰' for div in divergences], dtype=bool)
+        div_is_bottom = np.array([div['type'] == '底背驰' for div in divergences], dtype=bool)
+        fx_is_top = self._fx_arr['is_top']
+        day_gap = (self._fx_arr['dt'][:, None] - div_dts[None, :]) // np.timedelta64(1, 'D')
+        same_type = np.where(fx_is_top[:, None], div_is_top[None, :], div_is_bottom[None, :])
+        confirmed = ((np.abs(day_gap) <= 5) & same_type).any(axis=1)
+        
         # 基于分型和背驰识别买卖点
-        for i, fx in enumerate(self.c.fx_list):
-            if fx.mark.value == '底分型':
-                # 第一类买点：底分型
-                buy_type = "第一类买点"
-                
-                # 检查是否有背驰确认
-                for div in self.analysis_result.get('divergences', []):
-                    if (div['type'] == '底背驰' and 
-                        abs((fx.dt - div['current_bi'].fx_b.dt).days) <= 5):
-                        buy_type = "第二类买点"
-                        break
+        for fx, is_top, has_div in zip(self.c.fx_list, fx_is_top, confirmed):
+            if not is_top:
+                # 第一类买点：底分型，有底背驰确认时为第二类买点
+                buy_type = "第二类买点" if has_div else "第一类买点"
                 
                 buy_points.append({
                     'type': buy_type,
@@ -452,16 +716,9 @@ class AutoAnalyzer:
                     'fractal': fx
                 })
             
-            elif fx.mark.value == '顶分型':
-                # 第一类卖点：顶分型
-                sell_type = "第一类卖点"
-                
-                # 检查是否有背驰确认
-                for div in self.analysis_result.get('divergences', []):
-                    if (div['type'] == '顶背驰' and 
-                        abs((fx.dt - div['current_bi'].fx_b.dt).days) <= 5):
-                        sell_type = "第二类卖点"
-                        break
+            else:
+                # 第一类卖点：顶分型，有顶背驰确认时为第二类卖点
+                sell_type = "第二类卖点" if has_div else "第一类卖点"
                 
                 sell_points.append({
                     'type': sell_type,
@@ -518,9 +775,9 @@ class AutoAnalyzer:
                 fx_status = "已突破底分型" if current_price > latest_fx.fx else "仍在底分型下方"
         
         # 趋势判断
-        recent_strokes = self.c.bi_list[-3:] if len(self.c.bi_list) >= 3 else self.c.bi_list
-        up_count = len([bi for bi in recent_strokes if bi.direction.value == '向上'])
-        down_count = len([bi for bi in recent_strokes if bi.direction.value == '向下'])
+        recent = self._bi_arr['up'][-3:]
+        up_count = int(recent.sum())
+        down_count = len(recent) - up_count
         
         if up_count > down_count:
             trend_status = "多头趋势"
@@ -578,69 +835,54 @@ class AutoAnalyzer:
             return
         
         # 使用更准确的中枢识别算法
+        bi_list = self.c.bi_list
+        n = len(bi_list)
+        highs = np.maximum(self._bi_arr['a'], self._bi_arr['b'])
+        lows = np.minimum(self._bi_arr['a'], self._bi_arr['b'])
+        
+        # 所有连续三笔窗口的重叠区间一次算出
+        high_windows = sliding_window_view(highs, 3)
+        overlap_highs = high_windows.min(axis=1)
+        overlap_lows = sliding_window_view(lows, 3).max(axis=1)
+        # 重叠区间至少占平均价格的2%
+        overlap_ratios = (overlap_highs - overlap_lows) / (high_windows.sum(axis=1) / 3)
+        candidates = np.flatnonzero((overlap_highs > overlap_lows) & (overlap_ratios > 0.02))
+        
         pivots = []
-        i = 0
-        while i < len(self.c.bi_list) - 2:
-            # 取连续三笔
-            bi1 = self.c.bi_list[i]
-            bi2 = self.c.bi_list[i + 1] 
-            bi3 = self.c.bi_list[i + 2]
+        next_start = 0
+        for i in candidates.tolist():  # 转为Python int，结果中的笔数保持int类型
+            if i < next_start:
+                continue  # 已被前一个中枢覆盖
             
-            # 获取三笔的高低点
-            high1 = max(bi1.fx_a.fx, bi1.fx_b.fx)
-            low1 = min(bi1.fx_a.fx, bi1.fx_b.fx)
-            high2 = max(bi2.fx_a.fx, bi2.fx_b.fx)
-            low2 = min(bi2.fx_a.fx, bi2.fx_b.fx)
-            high3 = max(bi3.fx_a.fx, bi3.fx_b.fx)
-            low3 = min(bi3.fx_a.fx, bi3.fx_b.fx)
+            overlap_high = float(overlap_highs[i])
+            overlap_low = float(overlap_lows[i])
+            pivot = {
+                'start_dt': bi_list[i].fx_a.dt,
+                'end_dt': bi_list[i + 2].fx_b.dt, 
+                'high': overlap_high,
+                'low': overlap_low,
+                'center': (overlap_high + overlap_low) / 2,
+                'range': overlap_high - overlap_low,
+                'bi_count': 3,  # 初始为3笔
+                'type': '三笔中枢'
+            }
             
-            # 计算重叠区间
-            overlap_high = min(high1, high2, high3)
-            overlap_low = max(low1, low2, low3)
+            # 尝试扩展中枢（寻找更多参与的笔）
+            j = i + 3
+            while j < n and lows[j] < overlap_high and highs[j] > overlap_low:
+                j += 1
+            if j > i + 3:
+                pivot['end_dt'] = bi_list[j - 1].fx_b.dt
+                pivot['bi_count'] += j - (i + 3)
             
-            # 判断是否形成有效中枢（有重叠区间）
-            if overlap_high > overlap_low:
-                # 检查重叠区间的有效性（不能太小）
-                overlap_ratio = (overlap_high - overlap_low) / ((high1 + high2 + high3) / 3)
-                if overlap_ratio > 0.02:  # 重叠区间至少占平均价格的2%
-                    pivot = {
-                        'start_dt': bi1.fx_a.dt,
-                        'end_dt': bi3.fx_b.dt, 
-                        'high': overlap_high,
-                        'low': overlap_low,
-                        'center': (overlap_high + overlap_low) / 2,
-                        'range': overlap_high - overlap_low,
-                        'bi_count': 3,  # 初始为3笔
-                        'type': '三笔中枢'
-                    }
-                    
-                    # 尝试扩展中枢（寻找更多参与的笔）
-                    j = i + 3
-                    while j < len(self.c.bi_list):
-                        next_bi = self.c.bi_list[j]
-                        next_high = max(next_bi.fx_a.fx, next_bi.fx_b.fx)
-                        next_low = min(next_bi.fx_a.fx, next_bi.fx_b.fx)
-                        
-                        # 检查是否与中枢重叠
-                        if next_low < overlap_high and next_high > overlap_low:
-                            pivot['end_dt'] = next_bi.fx_b.dt
-                            pivot['bi_count'] += 1
-                            j += 1
-                        else:
-                            break
-                    
-                    # 更新中枢类型
-                    if pivot['bi_count'] >= 5:
-                        pivot['type'] = '扩展中枢'
-                    elif pivot['bi_count'] >= 3:
-                        pivot['type'] = '标准中枢'
-                    
-                    pivots.append(pivot)
-                    i = j  # 跳过已处理的笔
-                else:
-                    i += 1
-            else:
-                i += 1
+            # 更新中枢类型
+            if pivot['bi_count'] >= 5:
+                pivot['type'] = '扩展中枢'
+            elif pivot['bi_count'] >= 3:
+                pivot['type'] = '标准中枢'
+            
+            pivots.append(pivot)
+            next_start = j  # 跳过已处理的笔
         
         self.analysis_result['pivots'] = pivots
         print(f"  📊 识别中枢: {len(pivots)} 个")
@@ -687,25 +929,22 @@ class AutoAnalyzer:
     
     def _calculate_macd(self, prices, fast=12, slow=26, signal=9):
         """计算MACD指标"""
-        import pandas as pd
-        
-        # 转换为pandas Series
-        price_series = pd.Series(prices)
+        prices = np.asarray(prices, dtype=np.float64)
         
         # 计算EMA
-        ema_fast = price_series.ewm(span=fast).mean()
-        ema_slow = price_series.ewm(span=slow).mean()
+        ema_fast = _ema(prices, fast)
+        ema_slow = _ema(prices, slow)
         
         # 计算MACD线
         macd_line = ema_fast - ema_slow
         
         # 计算信号线
-        signal_line = macd_line.ewm(span=signal).mean()
+        signal_line = _ema(macd_line, signal)
         
         # 计算柱状图
         histogram = macd_line - signal_line
         
-        return macd_line.values, signal_line.values, histogram.values
+        return macd_line, signal_line, histogram
     
     def _draw_buy_sell_points(self, ax):
         """用简洁图标绘制买卖点"""
@@ -716,68 +955,107 @@ class AutoAnalyzer:
         buy_markers = {'第一类买点': 'o', '第二类买点': 's', '第三类买点': 'D'}
         sell_markers = {'第一类卖点': 'o', '第二类卖点': 's', '第三类卖点': 'D'}
         
-        for i, bp in enumerate(buy_points):
-            marker = buy_markers.get(bp['type'], 'o')
-            ax.scatter(bp['date'], bp['price'], marker=marker, s=150, 
+        # 按类型分组，每种类型只调用一次scatter（字典保持首次出现顺序，图例顺序不变）
+        buy_groups = {}
+        for bp in buy_points:
+            buy_groups.setdefault(bp['type'], []).append(bp)
+        for bp_type, group in buy_groups.items():
+            ax.scatter([bp['date'] for bp in group], [bp['price'] for bp in group],
+                      marker=buy_markers.get(bp_type, 'o'), s=150,
                       color='lime', alpha=0.9, zorder=7,
-                      edgecolors='darkgreen', linewidth=2,
-                      label=bp['type'] if i == 0 or bp['type'] not in [b['type'] for b in buy_points[:i]] else "")
+                      edgecolors='darkgreen', linewidth=2, label=bp_type)
         
         # 卖点用不同形状的红色标记
-        for i, sp in enumerate(sell_points):
-            marker = sell_markers.get(sp['type'], 'o')
-            ax.scatter(sp['date'], sp['price'], marker=marker, s=150, 
+        sell_groups = {}
+        for sp in sell_points:
+            sell_groups.setdefault(sp['type'], []).append(sp)
+        for sp_type, group in sell_groups.items():
+            ax.scatter([sp['date'] for sp in group], [sp['price'] for sp in group],
+                      marker=sell_markers.get(sp_type, 'o'), s=150,
                       color='red', alpha=0.9, zorder=7,
-                      edgecolors='darkred', linewidth=2,
-                      label=sp['type'] if i == 0 or sp['type'] not in [s['type'] for s in sell_points[:i]] else "")
+                      edgecolors='darkred', linewidth=2, label=sp_type)
     
-    def generate_visualization(self):
-        """生成可视化图表"""
+    @staticmethod
+    def _compress_png(path):
+        """
+        使用外部工具压缩PNG：优先pngquant（有损量化，体积最小），其次oxipng（无损），
+        都未安装时直接跳过
+        """
+        if shutil.which("pngquant"):
+            cmd = ["pngquant", "--skip-if-larger", "--force", "--output", path, path]
+        elif shutil.which("oxipng"):
+            cmd = ["oxipng", "-o", "2", path]
+        else:
+            return False
+        
+        # pngquant 在结果不更小时以非零状态退出，此时保留原图即可
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return result.returncode == 0
+    
+    def generate_visualization(self, compress_png=False):
+        """
+        生成可视化图表
+        
+        Args:
+            compress_png (bool): 保存后是否调用pngquant/oxipng压缩图片，默认关闭
+        """
         print("🎨 生成可视化图表...")
         
-        # Mac高DPI显示器优化设置
-        plt.rcParams['figure.dpi'] = 200  # 高DPI显示
-        plt.rcParams['savefig.dpi'] = 300  # 保存高质量
-        plt.rcParams['font.size'] = 10     # 适合高DPI的字体大小
-        plt.rcParams['axes.linewidth'] = 1.2  # 稍粗的坐标轴线
-        plt.rcParams['lines.linewidth'] = 1.5  # 稍粗的线条
+        _init_matplotlib()
+        import matplotlib.dates as mdates
+        from matplotlib.collections import LineCollection
+        from matplotlib.figure import Figure
         
         # 创建图表 - Mac高分辨率显示器优化 + MACD指标
         # 针对Mac 300DPI显示器，使用更高DPI以获得细腻效果
-        fig = plt.figure(figsize=(16, 14), dpi=200)  # 增加高度以容纳MACD
-        gs = fig.add_gridspec(6, 3, height_ratios=[4, 1.5, 1.2, 1, 1, 1], width_ratios=[2, 1, 1])
+        # 批量分析时复用同一个Figure，只清空内容，避免重复分配画布
+        if self._fig is None:
+            # constrained_layout 在绘制时一次完成布局，无需再调用 tight_layout 或 bbox_inches='tight'
+            self._fig = Figure(figsize=(16, 14), dpi=200, constrained_layout=True)  # 增加高度以容纳MACD
+        fig = self._fig
+        fig.clear()
+        # 共5行：K线、成交量、MACD、要素统计、图例说明
+        gs = fig.add_gridspec(5, 3, height_ratios=[4, 1.5, 1.2, 1, 1], width_ratios=[2, 1, 1])
         
         # 1. 主K线图 + 缠论分析
         ax1 = fig.add_subplot(gs[0, :])
         
-        dates = [bar.dt for bar in self.bars]
-        opens = [bar.open for bar in self.bars]
-        highs = [bar.high for bar in self.bars]
-        lows = [bar.low for bar in self.bars]
-        closes = [bar.close for bar in self.bars]
-        
-        # 绘制K线
-        for i in range(len(dates)):
-            color = 'red' if closes[i] >= opens[i] else 'green'
-            ax1.plot([dates[i], dates[i]], [lows[i], highs[i]], color='gray', linewidth=0.8)
-            ax1.plot([dates[i], dates[i]], [opens[i], closes[i]], color=color, linewidth=3)
-        
-        # 绘制分型
-        for fx in self.c.fx_list:
-            if fx.mark.value == '顶分型':
-                ax1.scatter(fx.dt, fx.fx, color='red', marker='v', s=120, zorder=5, 
-                           edgecolors='darkred', linewidth=2, label='顶分型' if fx == self.c.fx_list[0] else "")
-            else:
-                ax1.scatter(fx.dt, fx.fx, color='green', marker='^', s=120, zorder=5,
-                           edgecolors='darkgreen', linewidth=2, label='底分型' if fx == self.c.fx_list[0] else "")
-        
-        # 绘制笔
-        for i, bi in enumerate(self.c.bi_list):
-            color = 'blue' if bi.direction.value == '向上' else 'orange'
-            ax1.plot([bi.fx_a.dt, bi.fx_b.dt], [bi.fx_a.fx, bi.fx_b.fx], 
-                     color=color, linewidth=3, alpha=0.8,
-                     label='向上笔' if i == 0 and bi.direction.value == '向上' else 
-                           ('向下笔' if i == 0 and bi.direction.value == '向下' else ""))
+        # 直接按列读取行情数组，无需逐根K线取属性
+        dates = pd.to_datetime(self.df.index).to_numpy()
+        opens = self.df['Open'].to_numpy(dtype=np.float64)
+        highs = self.df['High'].to_numpy(dtype=np.float64)
+        lows = self.df['Low'].to_numpy(dtype=np.float64)
+        closes = self.df['Close'].to_numpy(dtype=np.float64)
+        
+        # 绘制K线：影线和实体各合并为一个LineCollection，避免逐根K线添加图元
+        x = mdates.date2num(dates)
+        wick_segs = np.stack([np.column_stack([x, lows]), np.column_stack([x, highs])], axis=1)
+        body_segs = np.stack([np.column_stack([x, opens]), np.column_stack([x, closes])], axis=1)
+        body_colors = np.where(closes >= opens, 'red', 'green')
+        ax1.add_collection(LineCollection(wick_segs, colors='gray', linewidths=0.8, rasterized=True))
+        ax1.add_collection(LineCollection(body_segs, colors=body_colors, linewidths=3, rasterized=True))
+        ax1.xaxis_date()
+        ax1.autoscale_view()
+        
+        # 绘制分型：顶/底分型各一次scatter
+        fx_is_top = self._fx_arr['is_top']
+        for mask, color, marker, edge, label in (
+                (fx_is_top, 'red', 'v', 'darkred', '顶分型'),
+                (~fx_is_top, 'green', '^', 'darkgreen', '底分型')):
+            if mask.any():
+                ax1.scatter(self._fx_arr['dt'][mask], self._fx_arr['fx'][mask], color=color, marker=marker,
+                            s=120, zorder=5, edgecolors=edge, linewidth=2, label=label)
+        
+        # 绘制笔：向上/向下笔各合并为一个LineCollection
+        bi_up = self._bi_arr['up']
+        bi_segs = np.stack([
+            np.column_stack([mdates.date2num(self._bi_arr['a_dt']), self._bi_arr['a']]),
+            np.column_stack([mdates.date2num(self._bi_arr['b_dt']), self._bi_arr['b']]),
+        ], axis=1)
+        for mask, color, label in ((bi_up, 'blue', '向上笔'), (~bi_up, 'orange', '向下笔')):
+            if mask.any():
+                ax1.add_collection(LineCollection(bi_segs[mask], colors=color, linewidths=3,
+                                                  alpha=0.8, label=label))
         
         # 绘制中枢（简化版：连续3笔以上的重叠区域）
         self._draw_pivot_zones(ax1)
@@ -795,9 +1073,8 @@ class AutoAnalyzer:
         
         # 2. 成交量图
         ax2 = fig.add_subplot(gs[1, :])
-        volumes = [bar.vol for bar in self.bars]
-        colors = ['red' if closes[i] >= opens[i] else 'green' for i in range(len(closes))]
-        ax2.bar(dates, volumes, color=colors, alpha=0.7)
+        volumes = self.df['Volume'].to_numpy(dtype=np.float64)
+        ax2.bar(dates, volumes, color=body_colors, alpha=0.7)
         ax2.set_ylabel('成交量', fontsize=12)
         ax2.set_title('成交量', fontsize=14)
         
@@ -823,78 +1100,36 @@ class AutoAnalyzer:
         ax3.legend(loc='upper right', fontsize=8)
         ax3.grid(True, alpha=0.3)
         
-        # 4. 分型统计
-        ax4 = fig.add_subplot(gs[3, 0])
+        # 4. 缠论要素统计：分型、笔、买卖点、背驰、中枢合并为一张柱状图
+        ax4 = fig.add_subplot(gs[3, :])
         fx_data = self.analysis_result['fractals']
-        fx_counts = [fx_data['top_count'], fx_data['bottom_count']]
-        fx_labels = ['顶分型', '底分型']
-        bars_fx = ax4.bar(fx_labels, fx_counts, color=['red', 'green'], alpha=0.8)
-        ax4.set_title('分型统计', fontsize=14)
-        ax4.set_ylabel('数量')
-        
-        for bar in bars_fx:
-            height = bar.get_height()
-            ax4.text(bar.get_x() + bar.get_width()/2., height + 0.5, f'{int(height)}', 
-                     ha='center', va='bottom', fontsize=12, fontweight='bold')
-        
-        # 5. 笔统计
-        ax5 = fig.add_subplot(gs[3, 1])
         stroke_data = self.analysis_result['strokes']
-        stroke_counts = [stroke_data['up_count'], stroke_data['down_count']]
-        stroke_labels = ['向上笔', '向下笔']
-        bars_stroke = ax4.bar(stroke_labels, stroke_counts, color=['blue', 'orange'], alpha=0.8)
-        ax4.set_title('笔统计', fontsize=14)
-        ax4.set_ylabel('数量')
-        
-        for bar in bars_stroke:
-            height = bar.get_height()
-            ax4.text(bar.get_x() + bar.get_width()/2., height + 0.2, f'{int(height)}', 
-                     ha='center', va='bottom', fontsize=12, fontweight='bold')
-        
-        # 5. 买卖点统计
-        ax5 = fig.add_subplot(gs[3, 0])
-        buy_sell_data = [len(self.analysis_result.get('buy_points', [])), 
-                        len(self.analysis_result.get('sell_points', []))]
-        buy_sell_labels = ['买点', '卖点']
-        bars_bs = ax5.bar(buy_sell_labels, buy_sell_data, color=['green', 'red'], alpha=0.8)
-        ax5.set_title('买卖点统计', fontsize=14)
-        ax5.set_ylabel('数量')
-        
-        for bar in bars_bs:
-            height = bar.get_height()
-            ax5.text(bar.get_x() + bar.get_width()/2., height + 0.1, f'{int(height)}', 
-                     ha='center', va='bottom', fontsize=12, fontweight='bold')
-        
-        # 6. 背驰统计
-        ax6 = fig.add_subplot(gs[3, 1])
         divergences = self.analysis_result.get('divergences', [])
-        top_div = len([d for d in divergences if d['type'] == '顶背驰'])
-        bottom_div = len([d for d in divergences if d['type'] == '底背驰'])
-        div_counts = [top_div, bottom_div]
-        div_labels = ['顶背驰', '底背驰']
-        bars_div = ax6.bar(div_labels, div_counts, color=['red', 'green'], alpha=0.8)
-        ax6.set_title('背驰统计', fontsize=14)
-        ax6.set_ylabel('数量')
-        
-        for bar in bars_div:
-            height = bar.get_height()
-            ax6.text(bar.get_x() + bar.get_width()/2., height + 0.05, f'{int(height)}', 
-                     ha='center', va='bottom', fontsize=12, fontweight='bold')
-        
-        # 7. 中枢统计
-        ax7 = fig.add_subplot(gs[3, 2])
+        div_counts = Counter(d['type'] for d in divergences)
+        top_div = div_counts['顶背驰']
+        bottom_div = div_counts['底背驰']
         # 计算中枢数量（简化）
         pivot_count = max(0, len(self.c.bi_list) - 2) if len(self.c.bi_list) >= 3 else 0
-        ax7.bar(['中枢'], [pivot_count], color='purple', alpha=0.8)
-        ax7.set_title('中枢统计', fontsize=14)
-        ax7.set_ylabel('数量')
-        ax7.text(0, pivot_count + 0.05, f'{pivot_count}', 
-                ha='center', va='bottom', fontsize=12, fontweight='bold')
         
-        # 8. 图例说明
-        ax8 = fig.add_subplot(gs[4, :])
-        ax8.axis('off')
-        ax8.set_title('缠论技术分析图例说明', fontsize=16, fontweight='bold', pad=20)
+        stat_labels = ['顶分型', '底分型', '向上笔', '向下笔', '买点', '卖点', '顶背驰', '底背驰', '中枢']
+        stat_counts = [
+            fx_data['top_count'], fx_data['bottom_count'],
+            stroke_data['up_count'], stroke_data['down_count'],
+            len(self.analysis_result.get('buy_points', [])), len(self.analysis_result.get('sell_points', [])),
+            top_div, bottom_div,
+            pivot_count,
+        ]
+        stat_colors = ['red', 'green', 'blue', 'orange', 'green', 'red', 'red', 'green', 'purple']
+        bars_stat = ax4.bar(stat_labels, stat_counts, color=stat_colors, alpha=0.8)
+        ax4.bar_label(bars_stat, fmt='%d', padding=2, fontsize=11, fontweight='bold')
+        ax4.margins(y=0.25)  # 为柱顶数字留出空间
+        ax4.set_title('缠论要素统计', fontsize=14)
+        ax4.set_ylabel('数量')
+        
+        # 5. 图例说明
+        ax5 = fig.add_subplot(gs[4, :])
+        ax5.axis('off')
+        ax5.set_title('缠论技术分析图例说明', fontsize=16, fontweight='bold', pad=20)
         
         # 创建图例说明
         legend_text = [
@@ -911,28 +1146,30 @@ class AutoAnalyzer:
         y_pos = 0.9
         for text in legend_text:
             if text.startswith('📊') or text.startswith('💡'):
-                ax8.text(0.02, y_pos, text, fontsize=14, fontweight='bold', 
-                        transform=ax8.transAxes)
+                ax5.text(0.02, y_pos, text, fontsize=14, fontweight='bold', 
+                        transform=ax5.transAxes)
             elif text == "":
                 pass  # 空行
             else:
-                ax8.text(0.05, y_pos, text, fontsize=12, 
-                        transform=ax8.transAxes)
+                ax5.text(0.05, y_pos, text, fontsize=12, 
+                        transform=ax5.transAxes)
             y_pos -= 0.15
         
-        plt.tight_layout()
-        
         # 确保输出目录存在
         self._ensure_output_dirs()
         
         # 生成带时间戳的文件名
         chart_filename = self._get_chart_filename()
         
-        # 保存图表 - Mac高DPI显示器优化设置
-        plt.savefig(chart_filename, dpi=300, bbox_inches='tight', 
+        # 保存图表 - 分辨率取自图表配置
+        # PNG编码耗时主要在zlib压缩，使用低压缩级别并跳过元数据写入
+        fig.savefig(chart_filename, dpi=default_config.chart.save_dpi,
                    facecolor='white', edgecolor='none', 
-                   format='png', pil_kwargs={'optimize': True})
-        plt.close()
+                   format='png', metadata={'Software': None},
+                   pil_kwargs={'compress_level': 1, 'optimize': False})
+        
+        if compress_png and self._compress_png(chart_filename):
+            print(f"🗜️ 图表已压缩: {os.path.getsize(chart_filename) / 1024:.0f} KB")
         
         # 保存文件路径
         self.last_chart_path = chart_filename
@@ -950,125 +1187,141 @@ class AutoAnalyzer:
         # 生成带时间戳的文件名
         report_filename = self._get_report_filename()
         
+        # 先在内存中拼接完整报告，最后一次性写入文件
+        parts = []
+        parts.append(f"# {self.stock_code} ({self.stock_name}) 缠论技术分析报告\n\n")
+        
+        # 基本信息
+        parts.append("## 📊 基本信息\n\n")
+        parts.append(f"- **股票代码**: {self.stock_code}\n")
+        parts.append(f"- **股票名称**: {self.stock_name}\n")
+        parts.append(f"- **分析日期**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        parts.append(f"- **数据范围**: {_fmt_date(self.df.index[0])} 至 {_fmt_date(self.df.index[-1])}\n")
+        parts.append(f"- **数据量**: {len(self.bars)} 个交易日\n\n")
+        
+        # 当前状态
+        current = self.analysis_result['current_status']
+        parts.append("## 💰 当前状态\n\n")
+        parts.append(f"- **当前价格**: {current['current_price']:.2f} 元\n")
+        parts.append(f"- **趋势状态**: {current['trend_status']}\n")
+        parts.append(f"- **分型状态**: {current['fx_status']}\n")
+        if current['latest_fx']:
+            parts.append(f"- **最新分型**: {current['latest_fx'].mark.value} @ {_fmt_date(current['latest_fx'].dt)} ({current['latest_fx'].fx:.2f}元)\n")
+        parts.append(f"- **距离最新分型**: {current['fx_distance']:+.2f}%\n\n")
+        
+        # 分型分析
+        fx_data = self.analysis_result['fractals']
+        parts.append("## 🔺 分型分析\n\n")
+        parts.append(f"- **总分型数**: {fx_data['total_count']} 个\n")
+        parts.append(f"- **顶分型数**: {fx_data['top_count']} 个\n")
+        parts.append(f"- **底分型数**: {fx_data['bottom_count']} 个\n\n")
+        
+        # 顶/底分型列表都按时间排序，最近10个分型只可能出现在各自末尾10个之中
+        recent_fx = heapq.nlargest(
+            10,
+            itertools.chain(fx_data['top_fractals'][-10:], fx_data['bottom_fractals'][-10:]),
+            key=lambda x: x.dt
+        )
+        # 表格整体拼成一个字符串
+        parts.append(
+            "### 最近分型详情\n\n"
+            "| 日期 | 类型 | 价格 |\n"
+            "|------|------|------|\n"
+            + "".join(f"| {_fmt_date(fx.dt)} | {fx.mark.value} | {fx.fx:.2f}元 |\n" for fx in recent_fx)
+            + "\n"
+        )
+        
+        # 笔分析
+        stroke_data = self.analysis_result['strokes']
+        parts.append("## 📏 笔分析\n\n")
+        parts.append(f"- **总笔数**: {stroke_data['total_count']} 笔\n")
+        parts.append(f"- **向上笔**: {stroke_data['up_count']} 笔，平均涨幅 {stroke_data['up_avg_change']:.2f}%，最大涨幅 {stroke_data['up_max_change']:.2f}%\n")
+        parts.append(f"- **向下笔**: {stroke_data['down_count']} 笔，平均跌幅 {stroke_data['down_avg_change']:.2f}%，最大跌幅 {stroke_data['down_max_change']:.2f}%\n\n")
+        
+        # 线段分析
+        segment_data = self.analysis_result['segments']
+        parts.append("## 📐 线段分析\n\n")
+        parts.append(f"- **线段数量**: {segment_data['total_count']} 个\n")
+        parts.append(f"- **平均长度**: {segment_data['avg_length']:.1f} 笔/线段\n\n")
+        
+        # 背驰分析
+        divergences = self.analysis_result['divergences']
+        parts.append("## ⚠️ 背驰分析\n\n")
+        parts.append(f"- **背驰总数**: {len(divergences)} 个\n")
+        
+        if divergences:
+            parts.append(
+                "\n### 背驰详情\n\n"
+                "| 类型 | 日期 | 强度 | 说明 |\n"
+                "|------|------|------|------|\n"
+                + "".join(
+                    f"| {div['type']} | {_fmt_date(div['current_bi'].fx_b.dt)} | {div['strength']:.1f}% | 当前笔{div['current_change']:.1f}% vs 前笔{div['prev_change']:.1f}% |\n"
+                    for div in divergences[-5:]  # 最近5个
+                )
+            )
+        parts.append("\n")
+        
+        # 买卖点分析
+        buy_points = self.analysis_result['buy_points']
+        sell_points = self.analysis_result['sell_points']
+        
+        parts.append("## 🎯 买卖点分析\n\n")
+        parts.append(f"- **买点总数**: {len(buy_points)} 个\n")
+        parts.append(f"- **卖点总数**: {len(sell_points)} 个\n\n")
+        
+        if buy_points:
+            parts.append(
+                "### 买点详情\n\n"
+                "| 类型 | 日期 | 价格 |\n"
+                "|------|------|------|\n"
+                + "".join(f"| {bp['type']} | {_fmt_date(bp['date'])} | {bp['price']:.2f}元 |\n" for bp in buy_points[-5:])
+                + "\n"
+            )
+        
+        if sell_points:
+            parts.append(
+                "### 卖点详情\n\n"
+                "| 类型 | 日期 | 价格 |\n"
+                "|------|------|------|\n"
+                + "".join(f"| {sp['type']} | {_fmt_date(sp['date'])} | {sp['price']:.2f}元 |\n" for sp in sell_points[-5:])
+                + "\n"
+            )
+        
+        # 投资建议
+        parts.append("## 💡 投资建议\n\n")
+        
+        # 基于分析结果给出建议
+        trend = current['trend_status']
+        fx_status = current['fx_status']
+        
+        if trend == "多头趋势" and "突破" in fx_status:
+            suggestion = "🟢 **建议关注** - 多头趋势且突破关键分型，可考虑适量买入"
+        elif trend == "空头趋势" and "跌破" in fx_status:
+            suggestion = "🔴 **建议回避** - 空头趋势且跌破关键分型，建议观望或减仓"
+        else:
+            suggestion = "🟡 **谨慎观望** - 趋势不明确，建议等待更清晰的信号"
+        
+        parts.append(f"{suggestion}\n\n")
+        
+        # 操作要点
+        parts.append("### 操作要点\n\n")
+        parts.append("1. **买入时机**: 关注底分型确认和背驰信号\n")
+        parts.append("2. **卖出时机**: 关注顶分型确认和背驰信号\n")
+        parts.append("3. **止损设置**: 跌破关键底分型或支撑位\n")
+        parts.append("4. **仓位管理**: 建议分批操作，控制风险\n\n")
+        
+        # 风险提示
+        parts.append("## ⚠️ 风险提示\n\n")
+        parts.append("- 本分析基于缠论技术分析，仅供参考，不构成投资建议\n")
+        parts.append("- 股市有风险，投资需谨慎\n")
+        parts.append("- 请结合基本面分析和市场环境综合判断\n")
+        parts.append("- 建议设置合理止损，控制投资风险\n\n")
+        
+        parts.append("---\n")
+        parts.append("*本报告由CZSC自动分析系统生成*\n")
+        
         with open(report_filename, 'w', encoding='utf-8') as f:
-            f.write(f"# {self.stock_code} ({self.stock_name}) 缠论技术分析报告\n\n")
-            
-            # 基本信息
-            f.write("## 📊 基本信息\n\n")
-            f.write(f"- **股票代码**: {self.stock_code}\n")
-            f.write(f"- **股票名称**: {self.stock_name}\n")
-            f.write(f"- **分析日期**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"- **数据范围**: {self.df.index[0].strftime('%Y-%m-%d')} 至 {self.df.index[-1].strftime('%Y-%m-%d')}\n")
-            f.write(f"- **数据量**: {len(self.bars)} 个交易日\n\n")
-            
-            # 当前状态
-            current = self.analysis_result['current_status']
-            f.write("## 💰 当前状态\n\n")
-            f.write(f"- **当前价格**: {current['current_price']:.2f} 元\n")
-            f.write(f"- **趋势状态**: {current['trend_status']}\n")
-            f.write(f"- **分型状态**: {current['fx_status']}\n")
-            if current['latest_fx']:
-                f.write(f"- **最新分型**: {current['latest_fx'].mark.value} @ {current['latest_fx'].dt.strftime('%Y-%m-%d')} ({current['latest_fx'].fx:.2f}元)\n")
-            f.write(f"- **距离最新分型**: {current['fx_distance']:+.2f}%\n\n")
-            
-            # 分型分析
-            fx_data = self.analysis_result['fractals']
-            f.write("## 🔺 分型分析\n\n")
-            f.write(f"- **总分型数**: {fx_data['total_count']} 个\n")
-            f.write(f"- **顶分型数**: {fx_data['top_count']} 个\n")
-            f.write(f"- **底分型数**: {fx_data['bottom_count']} 个\n\n")
-            
-            f.write("### 最近分型详情\n\n")
-            f.write("| 日期 | 类型 | 价格 |\n")
-            f.write("|------|------|------|\n")
-            recent_fx = (fx_data['top_fractals'][-5:] + fx_data['bottom_fractals'][-5:])
-            recent_fx.sort(key=lambda x: x.dt, reverse=True)
-            for fx in recent_fx[:10]:
-                f.write(f"| {fx.dt.strftime('%Y-%m-%d')} | {fx.mark.value} | {fx.fx:.2f}元 |\n")
-            f.write("\n")
-            
-            # 笔分析
-            stroke_data = self.analysis_result['strokes']
-            f.write("## 📏 笔分析\n\n")
-            f.write(f"- **总笔数**: {stroke_data['total_count']} 笔\n")
-            f.write(f"- **向上笔**: {stroke_data['up_count']} 笔，平均涨幅 {stroke_data['up_avg_change']:.2f}%，最大涨幅 {stroke_data['up_max_change']:.2f}%\n")
-            f.write(f"- **向下笔**: {stroke_data['down_count']} 笔，平均跌幅 {stroke_data['down_avg_change']:.2f}%，最大跌幅 {stroke_data['down_max_change']:.2f}%\n\n")
-            
-            # 线段分析
-            segment_data = self.analysis_result['segments']
-            f.write("## 📐 线段分析\n\n")
-            f.write(f"- **线段数量**: {segment_data['total_count']} 个\n")
-            f.write(f"- **平均长度**: {segment_data['avg_length']:.1f} 笔/线段\n\n")
-            
-            # 背驰分析
-            divergences = self.analysis_result['divergences']
-            f.write("## ⚠️ 背驰分析\n\n")
-            f.write(f"- **背驰总数**: {len(divergences)} 个\n")
-            
-            if divergences:
-                f.write("\n### 背驰详情\n\n")
-                f.write("| 类型 | 日期 | 强度 | 说明 |\n")
-                f.write("|------|------|------|------|\n")
-                for div in divergences[-5:]:  # 最近5个
-                    f.write(f"| {div['type']} | {div['current_bi'].fx_b.dt.strftime('%Y-%m-%d')} | {div['strength']:.1f}% | 当前笔{div['current_change']:.1f}% vs 前笔{div['prev_change']:.1f}% |\n")
-            f.write("\n")
-            
-            # 买卖点分析
-            buy_points = self.analysis_result['buy_points']
-            sell_points = self.analysis_result['sell_points']
-            
-            f.write("## 🎯 买卖点分析\n\n")
-            f.write(f"- **买点总数**: {len(buy_points)} 个\n")
-            f.write(f"- **卖点总数**: {len(sell_points)} 个\n\n")
-            
-            if buy_points:
-                f.write("### 买点详情\n\n")
-                f.write("| 类型 | 日期 | 价格 |\n")
-                f.write("|------|------|------|\n")
-                for bp in buy_points[-5:]:
-                    f.write(f"| {bp['type']} | {bp['date'].strftime('%Y-%m-%d')} | {bp['price']:.2f}元 |\n")
-                f.write("\n")
-            
-            if sell_points:
-                f.write("### 卖点详情\n\n")
-                f.write("| 类型 | 日期 | 价格 |\n")
-                f.write("|------|------|------|\n")
-                for sp in sell_points[-5:]:
-                    f.write(f"| {sp['type']} | {sp['date'].strftime('%Y-%m-%d')} | {sp['price']:.2f}元 |\n")
-                f.write("\n")
-            
-            # 投资建议
-            f.write("## 💡 投资建议\n\n")
-            
-            # 基于分析结果给出建议
-            trend = current['trend_status']
-            fx_status = current['fx_status']
-            
-            if trend == "多头趋势" and "突破" in fx_status:
-                suggestion = "🟢 **建议关注** - 多头趋势且突破关键分型，可考虑适量买入"
-            elif trend == "空头趋势" and "跌破" in fx_status:
-                suggestion = "🔴 **建议回避** - 空头趋势且跌破关键分型，建议观望或减仓"
-            else:
-                suggestion = "🟡 **谨慎观望** - 趋势不明确，建议等待更清晰的信号"
-            
-            f.write(f"{suggestion}\n\n")
-            
-            # 操作要点
-            f.write("### 操作要点\n\n")
-            f.write("1. **买入时机**: 关注底分型确认和背驰信号\n")
-            f.write("2. **卖出时机**: 关注顶分型确认和背驰信号\n")
-            f.write("3. **止损设置**: 跌破关键底分型或支撑位\n")
-            f.write("4. **仓位管理**: 建议分批操作，控制风险\n\n")
-            
-            # 风险提示
-            f.write("## ⚠️ 风险提示\n\n")
-            f.write("- 本分析基于缠论技术分析，仅供参考，不构成投资建议\n")
-            f.write("- 股市有风险，投资需谨慎\n")
-            f.write("- 请结合基本面分析和市场环境综合判断\n")
-            f.write("- 建议设置合理止损，控制投资风险\n\n")
-            
-            f.write("---\n")
-            f.write("*本报告由CZSC自动分析系统生成*\n")
+            f.write(''.join(parts))
         
         # 保存文件路径
         self.last_report_path = report_filename
@@ -1076,7 +1329,8 @@ class AutoAnalyzer:
         print(f"✅ 分析报告已保存: {report_filename}")
         return report_filename
     
-    def run_analysis(self, stock_code, start_date=None, end_date=None, days=None, kline_level=None):
+    def run_analysis(self, stock_code, start_date=None, end_date=None, days=None, kline_level=None,
+                     prefetched=None, generate_chart=True):
         """
         运行完整分析流程
         
@@ -1086,6 +1340,8 @@ class AutoAnalyzer:
             end_date (str): 结束日期，格式 'YYYYMMDD' 或 'YYYY-MM-DD'，默认当前日期
             days (int): 获取天数，当start_date和end_date都未指定时使用，默认根据K线级别设置
             kline_level (str): K线级别，可选值: '15m', '30m', '1d', '1wk'
+            prefetched (Future): 已提交到线程池的 _load_stock_data 任务，批量分析时传入
+            generate_chart (bool): 是否生成可视化图表，只需要报告时可关闭以跳过绘图
         """
         # 如果指定了新的K线级别，更新配置
         if kline_level and kline_level != self.kline_level:
@@ -1098,39 +1354,51 @@ class AutoAnalyzer:
         print(f"🚀 开始分析股票 {stock_code}")
         print("=" * 60)
         
+        # 新的一次分析使用新的时间戳
+        self._run_timestamp = None
+        
         try:
             # 1. 获取数据
-            if not self.get_stock_data(stock_code, start_date, end_date, days):
-                return False
-            
-            # 2. 转换格式
-            self.convert_to_czsc_format()
-            
-            # 3. 缠论分析
-            if not self.czsc_analysis():
+            if not self.get_stock_data(stock_code, start_date, end_date, days, prefetched=prefetched):
                 return False
             
-            # 4. 各项分析
-            self.analyze_fractals()
-            self.analyze_strokes()
-            self.analyze_segments()
-            self.analyze_pivots()  # 添加中枢分析
-            self.analyze_divergence()
-            self.analyze_buy_sell_points()
+            # 行情数据与之前某次分析完全相同时，直接复用缠论计算结果
+            cache_key = self._analysis_cache_key()
+            if self._restore_cached_analysis(cache_key):
+                print("♻️ 行情数据未变化，复用已有的缠论分析结果")
+            else:
+                # 2. 转换格式
+                self.convert_to_czsc_format()
+                
+                # 3. 缠论分析
+                if not self.czsc_analysis():
+                    return False
+                
+                # 4. 各项分析
+                self.analyze_fractals()
+                self.analyze_strokes()
+                self.analyze_segments()
+                self.analyze_pivots()  # 添加中枢分析
+                self.analyze_divergence()
+                self.analyze_buy_sell_points()
+                self._store_cached_analysis(cache_key)
             self.analyze_current_status()
             
             # 5. 准备分析结果
             self.prepare_analysis_result()
             
             # 6. 生成可视化
-            chart_file = self.generate_visualization()
+            if generate_chart:
+                chart_file = self.generate_visualization()
+            else:
+                chart_file = self.last_chart_path = None
             
             # 7. 生成报告
             report_file = self.generate_report()
             
             print("\n" + "=" * 60)
             print("🎉 分析完成！")
-            print(f"📊 可视化图表: {chart_file}")
+            print(f"📊 可视化图表: {chart_file or '已跳过'}")
             print(f"📄 分析报告: {report_file}")
             
             return True
@@ -1141,6 +1409,48 @@ class AutoAnalyzer:
             print("详细错误信息:")
             traceback.print_exc()
             return False
+    
+    @classmethod
+    def batch_analyze(cls, codes, start_date=None, end_date=None, days=None, kline_level=None,
+                      output_base_dir="./output", max_workers=4, generate_chart=True, on_result=None):
+        """
+        批量分析多只股票
+        
+        行情数据在线程池中预先获取，网络等待与前一只股票的缠论计算重叠进行；
+        分析和绘图仍在当前线程中按顺序执行。
+        
+        Args:
+            codes (list): 6位股票代码列表
+            start_date (str): 开始日期，格式 'YYYYMMDD' 或 'YYYY-MM-DD'
+            end_date (str): 结束日期，格式 'YYYYMMDD' 或 'YYYY-MM-DD'
+            days (int): 获取天数，当start_date和end_date都未指定时使用
+            kline_level (str): K线级别，可选值: '15m', '30m', '1d', '1wk'
+            output_base_dir (str): 输出文件基础目录
+            max_workers (int): 同时进行的数据请求数
+            generate_chart (bool): 是否生成可视化图表
+            on_result (callable): 每只股票分析结束后调用 on_result(code, analyzer, success)，
+                可在回调中读取该股票的分析结果和输出文件路径（下一只股票开始分析后会被覆盖）
+        
+        Returns:
+            dict: {股票代码: 是否分析成功}
+        """
+        analyzer = cls(kline_level=kline_level, output_base_dir=output_base_dir)
+        start_date, end_date = analyzer._resolve_date_range(start_date, end_date, days)
+        
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {code: executor.submit(analyzer._load_stock_data, code, start_date, end_date)
+                       for code in codes}
+            for code in codes:
+                results[code] = analyzer.run_analysis(code, start_date, end_date,
+                                                      prefetched=futures[code],
+                                                      generate_chart=generate_chart)
+                if on_result is not None:
+                    on_result(code, analyzer, results[code])
+        
+        success_count = sum(results.values())
+        print(f"\n📋 批量分析完成: 成功 {success_count}/{len(codes)}")
+        return results
 
 
 def main():
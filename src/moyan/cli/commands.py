@@ -5,8 +5,7 @@ CLI命令实现
 """
 
 import os
-import sys
-from typing import Any
+from typing import Any, Dict, List, Optional
 from pathlib import Path
 
 def analyze_command(args: Any) -> int:
@@ -21,6 +20,10 @@ def analyze_command(args: Any) -> int:
     """
     try:
         from ..core.analyzer import MoyanAnalyzer
+        from ..config.kline_config import DEFAULT_KLINE_LEVEL
+        
+        # 未指定K线级别时使用默认级别
+        args.kline = args.kline or DEFAULT_KLINE_LEVEL
         
         print(f"🚀 开始分析股票: {args.stock_code}")
         print(f"📈 K线级别: {args.kline}")
@@ -33,7 +36,8 @@ def analyze_command(args: Any) -> int:
             stock_code=args.stock_code,
             start_date=args.start,
             end_date=args.end,
-            days=args.days
+            days=args.days,
+            generate_chart=not args.no_chart
         )
         
         if result['success']:
@@ -47,7 +51,7 @@ def analyze_command(args: Any) -> int:
                     print(f"  {key}: {value}")
             
             # 显示输出文件
-            if result.get('charts'):
+            if result.get('charts') and result['charts'].get('main_chart'):
                 print(f"\n📈 图表文件: {result['charts']['main_chart']}")
             if result.get('reports'):
                 print(f"📄 报告文件: {result['reports']['markdown']}")
@@ -61,6 +65,53 @@ def analyze_command(args: Any) -> int:
         print(f"❌ 命令执行失败: {e}")
         return 1
 
+def _analyze_in_subprocess(stock_code: str, kline_level: str,
+                           start_date: Optional[str], end_date: Optional[str],
+                           generate_chart: bool = True) -> Dict[str, Any]:
+    """
+    在子进程中分析单只股票（模块级函数，供进程池序列化调用）
+    
+    分析数据中的CZSC对象无法跨进程传递，只返回可序列化的汇总字段
+    """
+    from ..core.analyzer import MoyanAnalyzer
+    
+    analyzer = MoyanAnalyzer(kline_level=kline_level)
+    result = analyzer.analyze(stock_code=stock_code, start_date=start_date, end_date=end_date,
+                              generate_chart=generate_chart)
+    if result.get('data'):
+        result['data'] = {
+            key: value for key, value in result['data'].items()
+            if isinstance(value, (str, int, float, bool, type(None)))
+        }
+    return result
+
+def _parallel_batch_analyze(stock_codes: List[str], args: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    使用进程池并行分析多只股票，每只股票的缠论计算和绘图相互独立
+    
+    Returns:
+        dict: {stock_code: analysis_result}，顺序与输入一致
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    
+    max_workers = min(len(stock_codes), os.cpu_count() or 1)
+    print(f"⚡ 并行模式: {max_workers} 个进程")
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            code: executor.submit(_analyze_in_subprocess, code, args.kline, args.start, args.end,
+                                  not args.no_chart)
+            for code in stock_codes
+        }
+        results = {}
+        for code, future in futures.items():
+            try:
+                results[code] = future.result()
+            except Exception as e:
+                results[code] = {'stock_code': code, 'success': False, 'error': str(e)}
+    
+    return results
+
 def batch_command(args: Any) -> int:
     """
     执行批量分析命令
@@ -73,6 +124,10 @@ def batch_command(args: Any) -> int:
     """
     try:
         from ..core.analyzer import MoyanAnalyzer
+        from ..config.kline_config import DEFAULT_KLINE_LEVEL
+        
+        # 未指定K线级别时使用默认级别
+        args.kline = args.kline or DEFAULT_KLINE_LEVEL
         
         # 解析股票代码列表
         stock_codes = [code.strip() for code in args.stock_codes.split(',')]
@@ -85,11 +140,15 @@ def batch_command(args: Any) -> int:
         analyzer = MoyanAnalyzer(kline_level=args.kline)
         
         # 执行批量分析
-        results = analyzer.batch_analyze(
-            stock_codes=stock_codes,
-            start_date=args.start,
-            end_date=args.end
-        )
+        if args.parallel and len(stock_codes) > 1:
+            results = _parallel_batch_analyze(stock_codes, args)
+        else:
+            results = analyzer.batch_analyze(
+                stock_codes=stock_codes,
+                start_date=args.start,
+                end_date=args.end,
+                generate_chart=not args.no_chart
+            )
         
         # 统计结果
         success_count = sum(1 for r in results.values() if r.get('success', False))
@@ -136,26 +195,37 @@ def web_command(args: Any) -> int:
         except ImportError:
             print("❌ Streamlit未安装，请运行: pip install streamlit")
             return 1
-        
+
+        # Web界面的交互图表依赖plotly
+        try:
+            import plotly
+        except ImportError:
+            print("❌ Plotly未安装，请运行: pip install plotly")
+            return 1
+
         # 查找streamlit应用文件
-        app_file = Path(__file__).parent.parent / "web" / "streamlit_app.py"
+        app_file = Path(__file__).parent.parent / "web" / "app.py"
         
         if not app_file.exists():
             print(f"❌ 找不到Web应用文件: {app_file}")
             return 1
         
-        # 启动streamlit
-        import subprocess
-        cmd = [
-            sys.executable, "-m", "streamlit", "run",
-            str(app_file),
-            "--server.port", str(args.port),
-            "--server.address", args.host,
-            "--server.headless", "true"
-        ]
-        
-        return subprocess.call(cmd)
+        # 在当前进程内启动streamlit，避免再拉起一个Python解释器
+        from streamlit.web import bootstrap
+        flag_options = {
+            'server.address': args.host,
+            'server.port': args.port,
+            'server.headless': True,
+            'browser.gatherUsageStats': False,
+            'theme.base': 'light',
+        }
+        bootstrap.load_config_options(flag_options=flag_options)
+        bootstrap.run(str(app_file), False, [], flag_options)
+        return 0
         
+    except KeyboardInterrupt:
+        print("\n👋 Web服务已停止")
+        return 0
     except Exception as e:
         print(f"❌ Web界面启动失败: {e}")
         return 1
@@ -225,64 +295,3 @@ def info_command(args: Any) -> int:
     except Exception as e:
         print(f"❌ 信息显示失败: {e}")
         return 1
-
-def web_command(args):
-    """启动Web界面"""
-    print("🌐 启动墨岩缠论分析系统Web界面")
-    print("=" * 60)
-    
-    try:
-        # 检查依赖
-        try:
-            import streamlit
-            print(f"✅ Streamlit v{streamlit.__version__} 已安装")
-        except ImportError:
-            print("❌ Streamlit未安装，请运行: pip install streamlit")
-            return 1
-        
-        try:
-            import plotly
-            print(f"✅ Plotly v{plotly.__version__} 已安装")
-        except ImportError:
-            print("❌ Plotly未安装，请运行: pip install plotly")
-            return 1
-        
-        # 启动Web应用
-        from ..web.app import run_web_app
-        
-        host = getattr(args, 'host', 'localhost')
-        port = getattr(args, 'port', 8501)
-        
-        print(f"📍 地址: http://{host}:{port}")
-        print("💡 按 Ctrl+C 停止服务")
-        print("🔄 正在启动...")
-        
-        # 直接运行streamlit应用
-        import streamlit.web.cli as stcli
-        import sys
-        from pathlib import Path
-        
-        # 获取web应用文件路径
-        web_app_path = Path(__file__).parent.parent / "web" / "app.py"
-        
-        # 构建streamlit运行参数
-        sys.argv = [
-            "streamlit",
-            "run",
-            str(web_app_path),
-            "--server.address", host,
-            "--server.port", str(port),
-            "--server.headless", "true",
-            "--browser.gatherUsageStats", "false",
-            "--theme.base", "light"
-        ]
-        
-        # 启动streamlit
-        stcli.main()
-        
-    except KeyboardInterrupt:
-        print("\n👋 Web服务已停止")
-        return 0
-    except Exception as e:
-        print(f"❌ 启动Web界面失败: {e}")
-        return 1
@@ -8,10 +8,31 @@ import sys
 import argparse
 from typing import List, Optional
 
-from ..config.kline_config import get_supported_levels, DEFAULT_KLINE_LEVEL
-from ..config.settings import default_config
 from .commands import analyze_command, batch_command, web_command, info_command
 
+class _VersionAction(argparse.Action):
+    """--version 参数：只在实际使用时才加载系统配置读取版本号"""
+    
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS,
+                 help="show program's version number and exit"):
+        super().__init__(option_strings=option_strings, dest=dest, default=default,
+                         nargs=0, help=help)
+    
+    def __call__(self, parser, namespace, values, option_string=None):
+        from ..config.settings import default_config
+        parser.exit(message=f"Moyan v{default_config.system.version}\n")
+
+def _kline_type(value: str) -> str:
+    """--kline 参数校验：解析到该参数时才加载K线级别配置"""
+    from ..config.kline_config import get_supported_levels
+    
+    levels = get_supported_levels()
+    if value not in levels:
+        raise argparse.ArgumentTypeError(
+            f"不支持的K线级别: {value} (可选: {', '.join(levels)})"
+        )
+    return value
+
 def create_parser() -> argparse.ArgumentParser:
     """创建命令行参数解析器"""
     parser = argparse.ArgumentParser(
@@ -40,8 +61,7 @@ def create_parser() -> argparse.ArgumentParser:
     # 添加全局参数
     parser.add_argument(
         '--version', 
-        action='version', 
-        version=f"Moyan v{default_config.system.version}"
+        action=_VersionAction
     )
     
     parser.add_argument(
@@ -78,10 +98,8 @@ def create_parser() -> argparse.ArgumentParser:
     
     analyze_parser.add_argument(
         '--kline', '-k',
-        type=str,
-        default=DEFAULT_KLINE_LEVEL,
-        choices=get_supported_levels(),
-        help=f'K线级别 (默认: {DEFAULT_KLINE_LEVEL})'
+        type=_kline_type,
+        help='K线级别，如 15m/30m/1h/1d/1wk/1mo (默认: 日线)'
     )
     
     analyze_parser.add_argument(
@@ -108,6 +126,12 @@ def create_parser() -> argparse.ArgumentParser:
         help='输出目录 (默认: 当前目录)'
     )
     
+    analyze_parser.add_argument(
+        '--no-chart',
+        action='store_true',
+        help='不生成可视化图表，只输出分析报告'
+    )
+    
     # batch命令
     batch_parser = subparsers.add_parser(
         'batch',
@@ -123,10 +147,8 @@ def create_parser() -> argparse.ArgumentParser:
     
     batch_parser.add_argument(
         '--kline', '-k',
-        type=str,
-        default=DEFAULT_KLINE_LEVEL,
-        choices=get_supported_levels(),
-        help=f'K线级别 (默认: {DEFAULT_KLINE_LEVEL})'
+        type=_kline_type,
+        help='K线级别，如 15m/30m/1h/1d/1wk/1mo (默认: 日线)'
     )
     
     batch_parser.add_argument(
@@ -147,10 +169,16 @@ def create_parser() -> argparse.ArgumentParser:
         help='输出目录 (默认: 当前目录)'
     )
     
+    batch_parser.add_argument(
+        '--no-chart',
+        action='store_true',
+        help='不生成可视化图表，只输出分析报告'
+    )
+    
     batch_parser.add_argument(
         '--parallel', '-p',
         action='store_true',
-        help='并行处理 (实验性功能)'
+        help='多进程并行分析'
     )
     
     # web命令
@@ -4,8 +4,32 @@
 统一管理Moyan系统的所有配置项
 """
 
-from .settings import MoyanConfig
-from .kline_config import KLINE_LEVELS, DEFAULT_KLINE_LEVEL
+import importlib
+import sys
+
+# 延迟导入表: 属性名 -> (模块, 对象名)
+# 只用到K线级别配置时（如CLI构建参数解析器）不必加载 settings 中的全部dataclass
+_LAZY_IMPORTS = {
+    "MoyanConfig": (".settings", "MoyanConfig"),
+    "KLINE_LEVELS": (".kline_config", "KLINE_LEVELS"),
+    "DEFAULT_KLINE_LEVEL": (".kline_config", "DEFAULT_KLINE_LEVEL"),
+}
+
+def __getattr__(name):
+    """按需导入配置对象 (PEP 562)"""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    module_name, attr_name = _LAZY_IMPORTS[name]
+    module = importlib.import_module(module_name, __package__)
+    value = getattr(module, attr_name)
+    
+    # 缓存到模块命名空间，后续访问不再经过 __getattr__
+    setattr(sys.modules[__name__], name, value)
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
 
 __all__ = [
     "MoyanConfig",
@@ -8,8 +8,10 @@
 - 推荐的使用场景
 """
 
-from typing import Dict, Any
+from typing import Any, Mapping
 from datetime import timedelta
+from functools import lru_cache
+from types import MappingProxyType
 
 # 各数据源对分钟级别数据的实际限制
 DATA_SOURCE_LIMITS = {
@@ -148,6 +150,18 @@ DATA_SOURCE_LIMITS = {
     }
 }
 
+# 限制表为只读常量，逐层冻结为只读视图
+DATA_SOURCE_LIMITS = MappingProxyType({
+    source_name: MappingProxyType({
+        **source_info,
+        'minute_levels': MappingProxyType({
+            level: MappingProxyType(limits)
+            for level, limits in source_info['minute_levels'].items()
+        }),
+    })
+    for source_name, source_info in DATA_SOURCE_LIMITS.items()
+})
+
 # 数据源优先级（分钟级别）
 MINUTE_DATA_PRIORITY = {
     '1h': ['eastmoney', 'sina', 'baostock', 'yfinance'],
@@ -156,30 +170,34 @@ MINUTE_DATA_PRIORITY = {
     '5m': ['eastmoney', 'sina', 'baostock']
 }
 
-def get_data_source_limits(kline_level: str) -> Dict[str, Any]:
+@lru_cache(maxsize=16)
+def get_data_source_limits(kline_level: str) -> Mapping[str, Any]:
     """
     获取指定K线级别的所有数据源限制信息
     
+    限制表是只读常量，结果按级别缓存，返回只读视图
+    
     Args:
         kline_level: K线级别 ('1h', '30m', '15m', '5m')
         
     Returns:
-        dict: 包含所有支持该级别的数据源限制信息
+        Mapping: 包含所有支持该级别的数据源限制信息
     """
     limits = {}
     
     for source_name, source_info in DATA_SOURCE_LIMITS.items():
         if kline_level in source_info['minute_levels']:
-            limits[source_name] = {
+            limits[source_name] = MappingProxyType({
                 'name': source_info['name'],
                 **source_info['minute_levels'][kline_level]
-            }
+            })
     
-    return limits
+    return MappingProxyType(limits)
 
+@lru_cache(maxsize=256)
 def get_best_data_source_for_days(kline_level: str, days: int) -> tuple:
     """
-    根据请求的天数推荐最佳数据源
+    根据请求的天数推荐最佳数据源（纯函数，按参数缓存）
     
     Args:
         kline_level: K线级别
@@ -4,6 +4,10 @@ K线级别配置
 定义支持的K线级别和相关参数
 """
 
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Mapping
+
 # K线级别配置
 KLINE_LEVELS = {
     '15m': {
@@ -74,6 +78,11 @@ KLINE_LEVELS = {
     }
 }
 
+# 级别表在运行期间只读，冻结为只读视图后可直接返回，无需每次复制
+KLINE_LEVELS = MappingProxyType({
+    level: MappingProxyType(config) for level, config in KLINE_LEVELS.items()
+})
+
 # 默认K线级别
 DEFAULT_KLINE_LEVEL = '1d'
 
@@ -96,7 +105,7 @@ KLINE_PRIORITY = {
     '1mo': 6,
 }
 
-def get_kline_config(level: str) -> dict:
+def get_kline_config(level: str) -> Mapping[str, Any]:
     """
     获取K线级别配置
     
@@ -104,7 +113,7 @@ def get_kline_config(level: str) -> dict:
         level: K线级别代码
         
     Returns:
-        dict: K线级别配置字典
+        Mapping: K线级别配置的只读视图，需要修改时请先 dict(...) 复制
         
     Raises:
         ValueError: 不支持的K线级别
@@ -112,11 +121,12 @@ def get_kline_config(level: str) -> dict:
     if level not in KLINE_LEVELS:
         raise ValueError(f"不支持的K线级别: {level}，支持的级别: {list(KLINE_LEVELS.keys())}")
     
-    return KLINE_LEVELS[level].copy()
+    return KLINE_LEVELS[level]
 
-def get_supported_levels() -> list:
-    """获取支持的K线级别列表"""
-    return list(KLINE_LEVELS.keys())
+@lru_cache(maxsize=1)
+def get_supported_levels() -> tuple:
+    """获取支持的K线级别列表（级别表固定不变，结果只计算一次）"""
+    return tuple(KLINE_LEVELS.keys())
 
 def get_level_name(level: str) -> str:
     """获取K线级别中文名称"""
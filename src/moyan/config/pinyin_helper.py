@@ -4,6 +4,8 @@
 专门用于A股股票名称的拼音转换
 """
 
+from functools import lru_cache
+
 # 更完整的汉字拼音首字母映射表
 PINYIN_MAP = {
     # 常用字
@@ -86,6 +88,23 @@ STOCK_CHARS = {
 # 合并字典
 CHAR_TO_PINYIN.update(STOCK_CHARS)
 
+@lru_cache(maxsize=8192)
+def _char_initial(char: str) -> str:
+    """单个字符的拼音首字母，数字和其他字符返回空串（按字符缓存，常用字只计算一次）"""
+    if char in CHAR_TO_PINYIN:
+        return CHAR_TO_PINYIN[char]
+    if '\u4e00' <= char <= '\u9fff':  # 中文字符
+        # 对于未映射的中文字符，使用简单规则
+        # 按照常见读音规律进行估算
+        unicode_val = ord(char)
+        if unicode_val < 20000:
+            return chr(ord('a') + (unicode_val % 26))
+        return 'z'
+    if char.isalpha():
+        return char.lower()
+    # 数字和其他字符忽略
+    return ''
+
 def get_pinyin_initial(text: str) -> str:
     """
     获取中文文本的拼音首字母
@@ -99,23 +118,7 @@ def get_pinyin_initial(text: str) -> str:
     if not text:
         return ''
     
-    result = ''
-    for char in text:
-        if char in CHAR_TO_PINYIN:
-            result += CHAR_TO_PINYIN[char]
-        elif '\u4e00' <= char <= '\u9fff':  # 中文字符
-            # 对于未映射的中文字符，使用简单规则
-            # 按照常见读音规律进行估算
-            unicode_val = ord(char)
-            if unicode_val < 20000:
-                result += chr(ord('a') + (unicode_val % 26))
-            else:
-                result += 'z'
-        elif char.isalpha():
-            result += char.lower()
-        # 数字和其他字符忽略
-    
-    return result
+    return ''.join(map(_char_initial, text))
 
 # 测试函数
 if __name__ == '__main__':
@@ -6,16 +6,25 @@ Moyan系统的全局配置管理
 
 import os
 from pathlib import Path
-from typing import Dict, Any, Optional
-from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+from dataclasses import asdict, dataclass, field
 
-@dataclass
-class ChartConfig:
+class _ConfigSection:
+    """配置段基类：每次给字段赋值都递增版本号，MoyanConfig 据此判断字典缓存是否过期"""
+    __slots__ = ('_version',)
+    
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, '_version', getattr(self, '_version', 0) + 1)
+
+@dataclass(slots=True)
+class ChartConfig(_ConfigSection):
     """图表配置"""
     # Mac高DPI显示器优化
     figsize: tuple = (16, 14)  # 图表尺寸 (英寸)
     dpi: int = 200             # 创建时DPI
-    save_dpi: int = 300        # 保存时DPI
+    save_dpi: int = 150        # 保存时DPI（屏幕和报告查看已足够清晰，编码量约为300DPI的1/4）
     font_size: int = 10        # 字体大小
     line_width: float = 1.5    # 线条粗细
     axes_line_width: float = 1.2  # 坐标轴粗细
@@ -25,15 +34,15 @@ class ChartConfig:
     grid: bool = True          # 是否显示网格
     grid_alpha: float = 0.3    # 网格透明度
 
-@dataclass
-class MacdConfig:
+@dataclass(slots=True)
+class MacdConfig(_ConfigSection):
     """MACD指标配置"""
     fast_period: int = 12      # 快速EMA周期
     slow_period: int = 26      # 慢速EMA周期
     signal_period: int = 9     # 信号线周期
 
-@dataclass
-class DataConfig:
+@dataclass(slots=True)
+class DataConfig(_ConfigSection):
     """数据获取配置"""
     default_start_date: str = '20250101'  # 默认开始日期
     data_source: str = 'yfinance'         # 数据源
@@ -41,8 +50,8 @@ class DataConfig:
     retry_times: int = 3                  # 重试次数
     retry_delay: float = 1.0              # 重试延迟(秒)
 
-@dataclass
-class CzscConfig:
+@dataclass(slots=True)
+class CzscConfig(_ConfigSection):
     """CZSC分析配置"""
     min_k_num: int = 7         # 最小K线数量
     max_k_num: int = 1000      # 最大K线数量
@@ -53,8 +62,8 @@ class CzscConfig:
     signals_module_name: str = 'czsc.signals'  # 信号模块名
     factors_module_name: str = 'czsc.factors'  # 因子模块名
 
-@dataclass
-class ColorConfig:
+@dataclass(slots=True)
+class ColorConfig(_ConfigSection):
     """颜色配置"""
     # K线颜色
     up_color: str = 'red'          # 上涨颜色
@@ -78,8 +87,8 @@ class ColorConfig:
     hist_up_color: str = 'red'     # 柱状图上涨
     hist_down_color: str = 'green' # 柱状图下跌
 
-@dataclass
-class OutputConfig:
+@dataclass(slots=True)
+class OutputConfig(_ConfigSection):
     """输出配置"""
     image_format: str = 'png'      # 图片格式
     image_quality: int = 95        # 图片质量
@@ -91,8 +100,8 @@ class OutputConfig:
     charts_dir: str = 'charts'     # 图表目录
     reports_dir: str = 'reports'   # 报告目录
 
-@dataclass
-class LogConfig:
+@dataclass(slots=True)
+class LogConfig(_ConfigSection):
     """日志配置"""
     level: str = 'INFO'            # 日志级别
     format: str = '{time:YYYY-MM-DD HH:mm:ss} | {level} | {name}:{function}:{line} | {message}'
@@ -103,8 +112,8 @@ class LogConfig:
     log_dir: str = 'logs'          # 日志目录
     log_file: str = 'moyan.log'    # 日志文件名
 
-@dataclass
-class SystemInfo:
+@dataclass(slots=True)
+class SystemInfo(_ConfigSection):
     """系统信息"""
     name: str = '墨岩缠论分析系统'
     english_name: str = 'Moyan CZSC Analysis System'
@@ -130,9 +139,18 @@ class MoyanConfig:
         Args:
             config_file: 配置文件路径 (可选)
         """
+        # get_*_config 返回的只读字典缓存：{配置段名: (配置段版本号, 只读字典)}，
+        # 配置段字段被赋值（版本号变化）或整个配置段被替换时失效
+        self._dict_cache = {}
         self.config_file = config_file
         self._load_config()
     
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        # 替换整个配置段（如 config.chart = ChartConfig(...)）时丢弃该段的字典缓存
+        if name != '_dict_cache':
+            self._dict_cache.pop(name, None)
+    
     def _load_config(self):
         """加载配置"""
         # 初始化默认配置
@@ -186,44 +204,30 @@ class MoyanConfig:
         for dir_path in dirs_to_create:
             Path(dir_path).mkdir(parents=True, exist_ok=True)
     
-    def get_chart_config(self) -> Dict[str, Any]:
-        """获取图表配置字典"""
-        return {
-            'figsize': self.chart.figsize,
-            'dpi': self.chart.dpi,
-            'save_dpi': self.chart.save_dpi,
-            'font_size': self.chart.font_size,
-            'line_width': self.chart.line_width,
-            'axes_line_width': self.chart.axes_line_width,
-            'style': self.chart.style,
-            'grid': self.chart.grid,
-            'grid_alpha': self.chart.grid_alpha,
-        }
+    def _cached_dict(self, section: str) -> Mapping[str, Any]:
+        """
+        按配置段缓存转换后的字典，配置在初始化后基本不变，无需每次重建
+        
+        返回只读视图，调用方共享同一份缓存；需要修改时请复制（dict(...)）或使用 update_config
+        """
+        config_obj = getattr(self, section)
+        version = getattr(config_obj, '_version', 0)
+        cached = self._dict_cache.get(section)
+        if cached is None or cached[0] != version:
+            cached = self._dict_cache[section] = (version, MappingProxyType(asdict(config_obj)))
+        return cached[1]
+    
+    def get_chart_config(self) -> Mapping[str, Any]:
+        """获取图表配置字典（只读）"""
+        return self._cached_dict('chart')
     
-    def get_macd_config(self) -> Dict[str, Any]:
-        """获取MACD配置字典"""
-        return {
-            'fast_period': self.macd.fast_period,
-            'slow_period': self.macd.slow_period,
-            'signal_period': self.macd.signal_period,
-        }
+    def get_macd_config(self) -> Mapping[str, Any]:
+        """获取MACD配置字典（只读）"""
+        return self._cached_dict('macd')
     
-    def get_color_config(self) -> Dict[str, Any]:
-        """获取颜色配置字典"""
-        return {
-            'up_color': self.color.up_color,
-            'down_color': self.color.down_color,
-            'top_fx_color': self.color.top_fx_color,
-            'bottom_fx_color': self.color.bottom_fx_color,
-            'up_bi_color': self.color.up_bi_color,
-            'down_bi_color': self.color.down_bi_color,
-            'buy_point_color': self.color.buy_point_color,
-            'sell_point_color': self.color.sell_point_color,
-            'macd_color': self.color.macd_color,
-            'signal_color': self.color.signal_color,
-            'hist_up_color': self.color.hist_up_color,
-            'hist_down_color': self.color.hist_down_color,
-        }
+    def get_color_config(self) -> Mapping[str, Any]:
+        """获取颜色配置字典（只读）"""
+        return self._cached_dict('color')
     
     def update_config(self, section: str, **kwargs):
         """
@@ -3,6 +3,9 @@
 股票代码数据库，支持代码、名称、拼音搜索
 """
 
+import heapq
+from types import MappingProxyType
+
 # 常用股票代码映射表
 STOCK_DATABASE = {
     # 主要指数ETF
@@ -54,7 +57,6 @@ STOCK_DATABASE = {
     "601988": {"name": "中国银行", "pinyin": "zgyh", "full_pinyin": "zhongguo yinhang"},
     
     # 保险股  
-    "601318": {"name": "中国平安", "pinyin": "zgpa", "full_pinyin": "zhongguo pingan"},
     "601601": {"name": "中国太保", "pinyin": "zgtb", "full_pinyin": "zhongguo taibao"},
     "601628": {"name": "中国人寿", "pinyin": "zgrs", "full_pinyin": "zhongguo renshou"},
     
@@ -76,6 +78,35 @@ STOCK_DATABASE = {
     "159919": {"name": "300ETF", "pinyin": "300etf", "full_pinyin": "chuangyeetf"},
 }
 
+# 数据库在导入后只读，冻结为只读视图
+STOCK_DATABASE = MappingProxyType({
+    code: MappingProxyType(info) for code, info in STOCK_DATABASE.items()
+})
+
+# 匹配类型优先级，数值越小越靠前
+_MATCH_PRIORITY = {
+    'code': 1,
+    'pinyin': 2,
+    'code_prefix': 3,
+    'name': 4,
+    'pinyin_prefix': 5,
+    'full_pinyin': 6
+}
+
+# 搜索索引：数据库在导入后不再变化，小写/去空格后的字段只在导入时计算一次
+# 每项为 (代码, 名称, 拼音首字母, 小写名称, 小写拼音首字母, 去空格小写全拼)
+_SEARCH_INDEX = tuple(
+    (
+        code,
+        info['name'],
+        info['pinyin'],
+        info['name'].lower(),
+        info['pinyin'].lower(),
+        info['full_pinyin'].lower().replace(' ', ''),
+    )
+    for code, info in STOCK_DATABASE.items()
+)
+
 def search_stock(query):
     """
     搜索股票，支持代码、名称、拼音
@@ -90,81 +121,68 @@ def search_stock(query):
         return []
     
     query = query.strip().lower()
+
+    # 1. 精确匹配股票代码：STOCK_DATABASE本身就是按代码的哈希索引，命中时无需扫描
+    info = STOCK_DATABASE.get(query)
+    if info is not None:
+        return [{
+            'code': query,
+            'name': info['name'],
+            'pinyin': info['pinyin'],
+            'match_type': 'code'
+        }]
+
     results = []
+    # 已收集结果中最靠前10个的优先级（取负存为最大堆），堆顶即第10名的优先级
+    top_ranks = []
+    cutoff = 7  # 不足10个结果时任何匹配都保留
     
-    for code, info in STOCK_DATABASE.items():
-        # 1. 精确匹配股票代码
-        if query == code:
-            results.append({
-                'code': code,
-                'name': info['name'],
-                'pinyin': info['pinyin'],
-                'match_type': 'code'
-            })
-            continue
-        
+    for code, name, pinyin, name_lower, pinyin_lower, full_pinyin_key in _SEARCH_INDEX:
         # 2. 代码前缀匹配
         if code.startswith(query) and len(query) >= 3:
-            results.append({
-                'code': code,
-                'name': info['name'],
-                'pinyin': info['pinyin'],
-                'match_type': 'code_prefix'
-            })
-            continue
-        
+            match_type = 'code_prefix'
         # 3. 股票名称包含匹配
-        if query in info['name'].lower():
-            results.append({
-                'code': code,
-                'name': info['name'],
-                'pinyin': info['pinyin'],
-                'match_type': 'name'
-            })
-            continue
-        
+        elif query in name_lower:
+            match_type = 'name'
         # 4. 拼音首字母匹配
-        if query == info['pinyin'].lower():
-            results.append({
-                'code': code,
-                'name': info['name'],
-                'pinyin': info['pinyin'],
-                'match_type': 'pinyin'
-            })
+        elif query == pinyin_lower:
+            match_type = 'pinyin'
+        # 剩余两种匹配优先级不高于已有的第10名，不必再做子串查找
+        elif cutoff <= 5:
             continue
-        
         # 5. 拼音首字母前缀匹配
-        if info['pinyin'].lower().startswith(query) and len(query) >= 2:
-            results.append({
-                'code': code,
-                'name': info['name'],
-                'pinyin': info['pinyin'],
-                'match_type': 'pinyin_prefix'
-            })
+        elif pinyin_lower.startswith(query) and len(query) >= 2:
+            match_type = 'pinyin_prefix'
+        # 6. 全拼音匹配
+        elif query in full_pinyin_key:
+            match_type = 'full_pinyin'
+        else:
             continue
         
-        # 6. 全拼音匹配
-        if query in info['full_pinyin'].lower().replace(' ', ''):
-            results.append({
-                'code': code,
-                'name': info['name'],
-                'pinyin': info['pinyin'],
-                'match_type': 'full_pinyin'
-            })
-    
-    # 按匹配类型排序：精确匹配 > 前缀匹配 > 包含匹配
-    priority = {
-        'code': 1,
-        'pinyin': 2,
-        'code_prefix': 3,
-        'name': 4,
-        'pinyin_prefix': 5,
-        'full_pinyin': 6
-    }
-    
-    results.sort(key=lambda x: priority.get(x['match_type'], 10))
-    
-    return results[:10]  # 最多返回10个结果
+        # 同优先级时先出现的排在前面，后来者只有优先级更高才可能进入前10
+        rank = _MATCH_PRIORITY[match_type]
+        if rank >= cutoff:
+            continue
+        
+        results.append({
+            'code': code,
+            'name': name,
+            'pinyin': pinyin,
+            'match_type': match_type
+        })
+        
+        if len(top_ranks) < 10:
+            heapq.heappush(top_ranks, -rank)
+        else:
+            heapq.heappushpop(top_ranks, -rank)
+        if len(top_ranks) == 10:
+            cutoff = -top_ranks[0]
+            if cutoff <= _MATCH_PRIORITY['pinyin']:
+                break  # 前10已全部是最高优先级的匹配，后面的条目无法再排进来
+    
+    # 按匹配类型排序取前10个：精确匹配 > 前缀匹配 > 包含匹配
+    # nsmallest与排序后切片结果一致（同优先级保持数据库顺序），但无需整体排序
+    return heapq.nsmallest(10, results, key=lambda x: _MATCH_PRIORITY[x['match_type']])
 
 def get_stock_info(code):
     """
@@ -6,15 +6,65 @@ A股数据库构建器
 
 import sqlite3
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import time
 import os
-from typing import Dict, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
 from datetime import datetime
 
+# 分页数据用orjson解析（C实现），未安装时回退到标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 代码前两位 -> 市场类型
+_MARKET_BY_PREFIX = {
+    '60': '沪A主板',
+    '68': '科创板',
+    '00': '深A主板',
+    '30': '创业板',
+}
+
+class TokenBucket:
+    """
+    线程安全的令牌桶限速器
+    
+    令牌按 rate 个/秒 持续补充，最多积攒 capacity 个；每次请求取走一个令牌，
+    桶空时阻塞到下一个令牌补充为止。空闲期间积攒的令牌可立即使用，不会白白等待
+    """
+    
+    def __init__(self, rate: float = 10, capacity: int = 10):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """取走一个令牌，桶空时阻塞等待"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            # 令牌可以预支为负数：排在后面的线程按顺序等待各自的令牌
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
 class StockDatabaseBuilder:
     """A股数据库构建器"""
     
+    # 分页请求速率上限(个/秒)及允许的突发请求数
+    REQUEST_RATE = 10
+    REQUEST_BURST = 10
+    
     def __init__(self, db_path: str = None):
         if db_path is None:
             # 默认数据库路径
@@ -41,11 +91,48 @@ class StockDatabaseBuilder:
         # 拼音映射工具
         self.pinyin_helper = None
         
-    def init_database(self):
-        """初始化数据库表结构"""
+        # 所有分页请求共用一个会话，复用TCP连接，避免每页重新建立连接
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'Mozilla/5.0'})
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=8,
+            max_retries=Retry(total=3, backoff_factor=0.3,
+                              status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.bucket = TokenBucket(rate=self.REQUEST_RATE, capacity=self.REQUEST_BURST)
+        
+    def init_database(self, create_indexes: bool = True):
+        """
+        初始化数据库表结构
+        
+        Args:
+            create_indexes: 是否同时创建查询索引。批量导入时应先导入数据再建索引，
+                避免每次插入都要维护多棵索引B树
+        """
         self.conn = sqlite3.connect(self.db_path)
         self.cursor = self.conn.cursor()
         
+        # 构建期间使用WAL日志：提交时只追加日志，不阻塞同时进行的查询
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA temp_store=MEMORY')
+        self.conn.execute('PRAGMA cache_size=-65536')  # 64MB页缓存
+        try:
+            self.conn.execute('PRAGMA mmap_size=268435456')
+        except sqlite3.DatabaseError:
+            pass  # 部分SQLite编译版本不支持内存映射
+        
+        self._create_tables()
+        if create_indexes:
+            self._create_indexes()
+        
+        self.conn.commit()
+        print(f"✅ 数据库初始化完成: {self.db_path}")
+    
+    def _create_tables(self):
+        """创建数据表（仅主键，不含查询索引）"""
         # 创建股票信息表
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS stocks (
@@ -66,6 +153,17 @@ class StockDatabaseBuilder:
             )
         ''')
         
+        # 创建元数据表
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS metadata (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+    
+    def _create_indexes(self):
+        """创建查询索引（已存在的索引保持不变）"""
         # 创建拼音搜索索引
         self.cursor.execute('''
             CREATE INDEX IF NOT EXISTS idx_pinyin ON stocks(pinyin)
@@ -81,17 +179,47 @@ class StockDatabaseBuilder:
             CREATE INDEX IF NOT EXISTS idx_market ON stocks(market)
         ''')
         
-        # 创建元数据表
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS metadata (
-                key TEXT PRIMARY KEY,
-                value TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
+        self._create_fts_index()
+    
+    def _create_fts_index(self):
+        """
+        创建名称子串搜索的FTS5全文索引（trigram分词）
+        
+        LIKE '%q%' 无法使用普通B树索引，trigram索引可以直接定位包含三字及以上子串的名称。
+        索引以 stocks 表为外部内容表，不重复存储名称，由触发器与 stocks 保持同步
+        """
+        exists = self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'stocks_fts'"
+        ).fetchone()
+        if exists:
+            return
+        
+        try:
+            self.cursor.execute('''
+                CREATE VIRTUAL TABLE stocks_fts USING fts5(
+                    name, content='stocks', content_rowid='rowid', tokenize='trigram'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            # SQLite 3.34 之前没有trigram分词器，名称搜索退回全表扫描
+            print(f"⚠️ 无法创建全文索引: {e}")
+            return
+        
+        self.cursor.executescript('''
+            CREATE TRIGGER IF NOT EXISTS stocks_fts_ai AFTER INSERT ON stocks BEGIN
+                INSERT INTO stocks_fts(rowid, name) VALUES (new.rowid, new.name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS stocks_fts_ad AFTER DELETE ON stocks BEGIN
+                INSERT INTO stocks_fts(stocks_fts, rowid, name) VALUES ('delete', old.rowid, old.name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS stocks_fts_au AFTER UPDATE OF name ON stocks BEGIN
+                INSERT INTO stocks_fts(stocks_fts, rowid, name) VALUES ('delete', old.rowid, old.name);
+                INSERT INTO stocks_fts(rowid, name) VALUES (new.rowid, new.name);
+            END;
         ''')
         
-        self.conn.commit()
-        print(f"✅ 数据库初始化完成: {self.db_path}")
+        # 批量导入的数据一次性建立索引
+        self.cursor.execute("INSERT INTO stocks_fts(stocks_fts) VALUES ('rebuild')")
         
     def get_pinyin_helper(self):
         """获取拼音转换工具"""
@@ -108,8 +236,26 @@ class StockDatabaseBuilder:
         
     def fetch_eastmoney_data(self) -> List[Dict]:
         """从东方财富获取A股数据"""
+        # 同一代码后产出的记录是信息更完整的版本，按代码覆盖，保留首次出现的顺序
+        stocks_by_code = {stock['code']: stock for batch in self.iter_eastmoney_batches() for stock in batch}
+        return list(stocks_by_code.values())
+    
+    def iter_eastmoney_batches(self, batch_size: int = 1000) -> Iterator[List[Dict]]:
+        """
+        从东方财富获取A股数据，按批次逐步产出去重后的股票记录
+        
+        分页请求在线程池中并发进行，调用方处理当前批次（如写入数据库）时后续分页仍在下载，
+        网络与磁盘IO相互重叠
+        
+        同一只股票通常只产出一次；若后面的分页带有先前缺失的行业信息，会再次产出该股票的完整记录，
+        保存时按代码覆盖
+        
+        Args:
+            batch_size: 每批最多包含的股票数
+        """
         print("🌐 正在从东方财富获取A股数据...")
-        all_stocks = []
+        batch = []
+        total = 0
         
         # 分批获取策略
         strategies = [
@@ -124,128 +270,149 @@ class StockDatabaseBuilder:
             {'name': '活跃股票', 'fid': 'f5', 'fs': 'm:0+t:6,m:0+t:80,m:1+t:2,m:1+t:23', 'pages': 8},
         ]
         
-        stock_codes = set()  # 用于去重
-        
-        for strategy in strategies:
-            print(f"  📊 获取{strategy['name']}...")
+        # 所有分页请求并发提交到线程池，共用会话的连接池；请求速率由令牌桶控制
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [
+                (strategy, [executor.submit(self._fetch_page, strategy, page)
+                            for page in range(1, strategy['pages'] + 1)])
+                for strategy in strategies
+            ]
             
-            for page in range(1, strategy['pages'] + 1):
-                try:
-                    params = {
-                        'pn': str(page),
-                        'pz': '100',
-                        'po': '1',
-                        'np': '1',
-                        'ut': 'bd1d9ddb04089700cf9c27f6f7426281',
-                        'fltt': '2',
-                        'invt': '2',
-                        'fid': strategy['fid'],
-                        'fs': strategy['fs'],
-                        'fields': 'f12,f14,f2,f3,f20,f116,f117,f26'  # 代码,名称,价格,涨跌幅,市值,总股本,流通股本,行业
-                    }
-                    
-                    response = requests.get(self.data_sources['eastmoney']['url'], 
-                                          params=params, timeout=10)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        if data.get('data') and data['data'].get('diff'):
-                            for stock in data['data']['diff']:
-                                code = stock.get('f12', '')
-                                name = stock.get('f14', '')
-                                
-                                if code and name and code not in stock_codes:
-                                    stock_codes.add(code)
-                                    
-                                    # 确定市场类型
-                                    if code.startswith('60'):
-                                        market = '沪A主板'
-                                    elif code.startswith('68'):
-                                        market = '科创板'
-                                    elif code.startswith('00'):
-                                        market = '深A主板'
-                                    elif code.startswith('30'):
-                                        market = '创业板'
-                                    else:
-                                        market = '其他'
-                                    
-                                    stock_info = {
-                                        'code': code,
-                                        'name': name,
-                                        'market': market,
-                                        'price': stock.get('f2', 0) or 0,
-                                        'market_cap': stock.get('f20', 0) or 0,
-                                        'industry': stock.get('f26', '') or '',
-                                        'source': 'eastmoney'
-                                    }
-                                    all_stocks.append(stock_info)
-                    
-                    # 避免请求过于频繁
-                    time.sleep(0.1)
-                    
-                except Exception as e:
-                    print(f"    ❌ 第{page}页获取失败: {e}")
-                    continue
+            stocks_by_code = {}  # 用于去重，记录每只股票最新产出的记录
             
-            print(f"    ✅ {strategy['name']}: 累计获取 {len(all_stocks)} 只股票")
-        
-        print(f"🎉 东方财富数据获取完成，共 {len(all_stocks)} 只股票")
-        return all_stocks
+            # 按策略和页码的原始顺序汇总，去重结果与逐页顺序获取时一致
+            for strategy, page_futures in futures:
+                print(f"  📊 获取{strategy['name']}...")
+                
+                for page_future in page_futures:
+                    for stock in page_future.result():
+                        code = stock.get('f12', '')
+                        name = stock.get('f14', '')
+                        
+                        if not (code and name):
+                            continue
+                        
+                        existing = stocks_by_code.get(code)
+                        if existing is None or (not existing['industry'] and stock.get('f26')):
+                            stock_info = {
+                                'code': code,
+                                'name': name,
+                                'market': _MARKET_BY_PREFIX.get(code[:2], '其他'),
+                                'price': stock.get('f2', 0) or 0,
+                                'market_cap': stock.get('f20', 0) or 0,
+                                'industry': stock.get('f26', '') or '',
+                                'source': 'eastmoney'
+                            }
+                            stocks_by_code[code] = stock_info
+                            batch.append(stock_info)
+                            if existing is None:
+                                total += 1
+                            
+                            if len(batch) >= batch_size:
+                                yield batch
+                                batch = []
+                
+                print(f"    ✅ {strategy['name']}: 累计获取 {total} 只股票")
+        
+        if batch:
+            yield batch
+        print(f"🎉 东方财富数据获取完成，共 {total} 只股票")
+    
+    def _fetch_page(self, strategy: Dict, page: int) -> List[Dict]:
+        """获取某个策略的一页数据，返回原始股票记录列表，失败时返回空列表"""
+        try:
+            params = {
+                'pn': str(page),
+                'pz': '100',
+                'po': '1',
+                'np': '1',
+                'ut': 'bd1d9ddb04089700cf9c27f6f7426281',
+                'fltt': '2',
+                'invt': '2',
+                'fid': strategy['fid'],
+                'fs': strategy['fs'],
+                'fields': 'f12,f14,f2,f3,f20,f116,f117,f26'  # 代码,名称,价格,涨跌幅,市值,总股本,流通股本,行业
+            }
+            
+            # 避免请求过于频繁
+            self.bucket.acquire()
+            response = self.session.get(self.data_sources['eastmoney']['url'],
+                                        params=params, timeout=10)
+            
+            if response.status_code == 200:
+                data = _json_loads(response.content)
+                if data.get('data') and data['data'].get('diff'):
+                    return data['data']['diff']
+            return []
+            
+        except Exception as e:
+            print(f"    ❌ {strategy['name']}第{page}页获取失败: {e}")
+            return []
     
     def save_stocks_to_db(self, stocks: List[Dict]):
         """保存股票数据到数据库"""
         print(f"💾 正在保存 {len(stocks)} 只股票到数据库...")
+        self.save_stock_batches([stocks])
+    
+    def save_stock_batches(self, batches: Iterable[List[Dict]]):
+        """
+        分批保存股票数据到数据库，所有批次处于同一个事务中，全部写入后统一提交
         
+        Args:
+            batches: 股票记录批次，可以是边获取边产出的生成器（见 iter_eastmoney_batches）
+        """
         pinyin_func = self.get_pinyin_helper()
-        saved_count = 0
-        updated_count = 0
         
-        for stock in stocks:
-            # 生成拼音
-            pinyin = pinyin_func(stock['name'])
-            
-            # 检查股票是否已存在
-            self.cursor.execute('SELECT code FROM stocks WHERE code = ?', (stock['code'],))
-            exists = self.cursor.fetchone()
+        self.cursor.execute('SELECT COUNT(*) FROM stocks')
+        count_before = self.cursor.fetchone()[0]
+        
+        # 同一代码可能在多个批次中出现（后者覆盖前者），按不同代码计数
+        written_codes = set()
+        for stocks in batches:
+            # 每个不同的名称只转换一次拼音
+            # 代码统一大写、拼音统一小写存储，查询时可直接按索引做区间匹配
+            pinyin_map = {name: pinyin_func(name) for name in {stock['name'] for stock in stocks}}
+            # 生成器逐行提供参数，executemany 边迭代边执行，不再额外构造整批元组列表
+            rows = (
+                (
+                    stock['code'].upper(), stock['name'], pinyin_map[stock['name']].lower(), stock['market'],
+                    stock['price'], stock['market_cap'], stock['industry'], stock['source']
+                )
+                for stock in stocks
+            )
             
-            if exists:
-                # 更新现有记录
-                self.cursor.execute('''
-                    UPDATE stocks SET 
-                        name = ?, pinyin = ?, market = ?, price = ?, 
-                        market_cap = ?, industry = ?, source = ?,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE code = ?
-                ''', (
-                    stock['name'], pinyin, stock['market'], stock['price'],
-                    stock['market_cap'], stock['industry'], stock['source'],
-                    stock['code']
-                ))
-                updated_count += 1
-            else:
-                # 插入新记录
-                self.cursor.execute('''
-                    INSERT INTO stocks (
-                        code, name, pinyin, market, price, market_cap, 
-                        industry, source
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    stock['code'], stock['name'], pinyin, stock['market'],
-                    stock['price'], stock['market_cap'], stock['industry'],
-                    stock['source']
-                ))
-                saved_count += 1
-        
-        # 更新元数据
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO metadata (key, value, updated_at) 
-            VALUES (?, ?, CURRENT_TIMESTAMP)
-        ''', ('last_update', datetime.now().isoformat()))
+            # 单条UPSERT语句批量执行：不再逐只先查询是否存在，语句只解析一次
+            self.cursor.executemany('''
+                INSERT INTO stocks (
+                    code, name, pinyin, market, price, market_cap,
+                    industry, source
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(code) DO UPDATE SET
+                    name = excluded.name, pinyin = excluded.pinyin,
+                    market = excluded.market, price = excluded.price,
+                    market_cap = excluded.market_cap, industry = excluded.industry,
+                    source = excluded.source, updated_at = CURRENT_TIMESTAMP
+            ''', rows)
+            written_codes.update(stock['code'].upper() for stock in stocks)
+        
+        if not written_codes:
+            print("⚠️ 没有需要保存的股票数据")
+            return
         
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO metadata (key, value, updated_at) 
+        self.cursor.execute('SELECT COUNT(*) FROM stocks')
+        saved_count = self.cursor.fetchone()[0] - count_before
+        updated_count = len(written_codes) - saved_count
+        
+        # 更新元数据：与股票数据处于同一事务，一次提交
+        self.cursor.executemany('''
+            INSERT INTO metadata (key, value, updated_at)
             VALUES (?, ?, CURRENT_TIMESTAMP)
-        ''', ('total_stocks', str(saved_count + updated_count)))
+            ON CONFLICT(key) DO UPDATE SET
+                value = excluded.value, updated_at = CURRENT_TIMESTAMP
+        ''', [
+            ('last_update', datetime.now().isoformat()),
+            ('total_stocks', str(len(written_codes))),
+        ])
         
         self.conn.commit()
         print(f"✅ 数据保存完成: 新增 {saved_count} 只，更新 {updated_count} 只")
@@ -276,15 +443,19 @@ class StockDatabaseBuilder:
         """构建完整的A股数据库"""
         print("🚀 开始构建A股本地数据库...")
         
-        # 1. 初始化数据库
-        self.init_database()
+        # 1. 初始化数据库（索引在数据导入后再建；已有数据库的索引保留，增量更新无需重建）
+        self.init_database(create_indexes=False)
         
-        # 2. 获取东财数据
-        stocks = self.fetch_eastmoney_data()
+        # 2. 获取东财数据并逐批保存到数据库：后续分页的下载与前面批次的写入同时进行
+        self.save_stock_batches(self.iter_eastmoney_batches())
         
-        # 3. 保存到数据库
-        if stocks:
-            self.save_stocks_to_db(stocks)
+        # 3. 建立索引并更新查询优化器统计信息
+        # 统计信息写入数据库文件（sqlite_stat1），随包分发后所有查询连接直接使用，
+        # 查询端不再执行 PRAGMA optimize，以免改写只读安装目录下的数据文件
+        self._create_indexes()
+        self.cursor.execute('ANALYZE')
+        self.conn.commit()
+        self.conn.execute('PRAGMA optimize')
         
         # 4. 显示统计信息
         stats = self.get_database_stats()
@@ -299,10 +470,65 @@ class StockDatabaseBuilder:
         return stats
     
     def close(self):
-        """关闭数据库连接"""
+        """关闭数据库连接和HTTP会话"""
+        self.session.close()
         if self.conn:
+            # 合并WAL并恢复为单文件数据库，数据库文件随包分发，只读安装目录下无法创建WAL辅助文件
+            self.conn.execute('PRAGMA journal_mode=DELETE')
             self.conn.close()
 
+# StockDatabase 的查询语句：固定的SQL文本配合长期复用的连接，
+# 每条语句只在连接的语句缓存中编译一次
+
+# 搜索：四类匹配合并为一条 UNION ALL 查询，按 1.精确代码 2.代码前缀(至少3位)
+# 3.名称包含 4.拼音前缀 的顺序输出；每一类都排除前面已匹配的股票。
+# 同一类内按代码排序，结果顺序不依赖表中行的物理存储顺序（建库/UPSERT后行序可能变化）
+_Q_SEARCH_TEMPLATE = '''
+    SELECT code, name, pinyin, market, price, 0 AS match_rank
+    FROM stocks WHERE code = :code
+    UNION ALL
+    SELECT code, name, pinyin, market, price, 1
+    FROM stocks WHERE :code_prefix AND code >= :code AND code < :code_end
+    AND code != :code
+    UNION ALL
+    SELECT code, name, pinyin, market, price, 2
+    FROM stocks WHERE {name_match}
+    AND NOT (code = :code OR (:code_prefix AND code >= :code AND code < :code_end))
+    UNION ALL
+    SELECT code, name, pinyin, market, price, 3
+    FROM stocks WHERE pinyin >= :pinyin AND pinyin < :pinyin_end
+    AND LOWER(name) NOT LIKE :name_like
+    AND NOT (code = :code OR (:code_prefix AND code >= :code AND code < :code_end))
+    ORDER BY match_rank, code
+    LIMIT :limit
+'''
+# 名称包含匹配逐行扫描
+_Q_SEARCH = _Q_SEARCH_TEMPLATE.format(name_match='LOWER(name) LIKE :name_like')
+# 名称包含匹配先查trigram全文索引（仅三字及以上的关键词可用索引）
+_Q_SEARCH_FTS = _Q_SEARCH_TEMPLATE.format(
+    name_match='rowid IN (SELECT rowid FROM stocks_fts WHERE name LIKE :name_like)'
+)
+_Q_HAS_FTS = "SELECT 1 FROM sqlite_master WHERE name = 'stocks_fts'"
+_Q_STOCK_INFO = 'SELECT * FROM stocks WHERE code = ?'
+_Q_COUNT = 'SELECT COUNT(*) FROM stocks'
+_Q_COUNT_BY_MARKET = '''
+    SELECT market, COUNT(*) FROM stocks
+    GROUP BY market ORDER BY COUNT(*) DESC
+'''
+
+# search_stocks 中各匹配优先级对应的匹配类型
+_DB_MATCH_TYPES = ('code', 'code_prefix', 'name', 'pinyin')
+
+def _prefix_upper_bound(prefix: str) -> str:
+    """
+    前缀匹配的区间上界（不含）：以 prefix 开头的字符串都落在 [prefix, 上界) 内
+    
+    用区间条件代替 LIKE 'prefix%'，SQLite可以直接在索引上做范围扫描
+    """
+    if not prefix:
+        return '\U0010ffff'
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
 # 数据库操作类
 class StockDatabase:
     """A股数据库查询接口（线程安全版本）"""
@@ -314,17 +540,28 @@ class StockDatabase:
         else:
             self.db_path = db_path
         
-        # 不在初始化时创建连接，而是在每次使用时创建
-        self.conn = None
+        # 每个线程持有一个长期复用的连接，首次使用时创建
+        self._local = threading.local()
         
     def _get_connection(self):
-        """获取数据库连接（线程安全）"""
-        # 每次都创建新的连接，避免线程问题
+        """获取当前线程的数据库连接（线程安全）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        
         if not os.path.exists(self.db_path):
             return None
         
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=128)
         conn.row_factory = sqlite3.Row  # 使结果可以像字典一样访问
+        conn.execute('PRAGMA temp_store=MEMORY')
+        try:
+            conn.execute('PRAGMA mmap_size=268435456')  # 查询直接读取内存映射页
+        except sqlite3.DatabaseError:
+            pass
+        # 旧版本构建的数据库没有全文索引，名称搜索只能逐行扫描
+        self._local.has_fts = conn.execute(_Q_HAS_FTS).fetchone() is not None
+        self._local.conn = conn
         return conn
     
     def search_stocks(self, query: str, limit: int = 10) -> List[Dict]:
@@ -335,91 +572,39 @@ class StockDatabase:
         
         try:
             query = query.strip().lower()
-            results = []
+            # 代码按大写存储：直接比较，走主键索引
+            code_query = query.upper()
+            
+            # trigram至少需要三个字符，更短的关键词走索引反而要扫描整个全文索引
+            use_fts = self._local.has_fts and len(query) >= 3
             
             cursor = conn.cursor()
+            cursor.execute(_Q_SEARCH_FTS if use_fts else _Q_SEARCH, {
+                'code': code_query,
+                'code_prefix': len(query) >= 3,
+                'code_end': _prefix_upper_bound(code_query),
+                'name_like': f'%{query}%',
+                'pinyin': query,
+                'pinyin_end': _prefix_upper_bound(query),
+                'limit': limit,
+            })
             
-            # 1. 精确代码匹配
-            cursor.execute('''
-                SELECT * FROM stocks WHERE LOWER(code) = ? LIMIT ?
-            ''', (query, limit))
-            for row in cursor.fetchall():
-                results.append({
+            return [
+                {
                     'code': row['code'],
                     'name': row['name'],
                     'pinyin': row['pinyin'],
                     'market': row['market'],
                     'price': row['price'],
-                    'match_type': 'code',
+                    'match_type': _DB_MATCH_TYPES[row['match_rank']],
                     'source': 'database'
-                })
-            
-            if len(results) >= limit:
-                return results[:limit]
-            
-            # 2. 代码前缀匹配
-            if len(query) >= 3:
-                cursor.execute('''
-                    SELECT * FROM stocks WHERE LOWER(code) LIKE ? 
-                    AND LOWER(code) != ? LIMIT ?
-                ''', (f'{query}%', query, limit - len(results)))
-                for row in cursor.fetchall():
-                    results.append({
-                        'code': row['code'],
-                        'name': row['name'],
-                        'pinyin': row['pinyin'],
-                        'market': row['market'],
-                        'price': row['price'],
-                        'match_type': 'code_prefix',
-                        'source': 'database'
-                    })
-            
-            if len(results) >= limit:
-                return results[:limit]
-            
-            # 3. 名称包含匹配
-            cursor.execute('''
-                SELECT * FROM stocks WHERE LOWER(name) LIKE ? LIMIT ?
-            ''', (f'%{query}%', limit - len(results)))
-            for row in cursor.fetchall():
-                if not any(r['code'] == row['code'] for r in results):
-                    results.append({
-                        'code': row['code'],
-                        'name': row['name'],
-                        'pinyin': row['pinyin'],
-                        'market': row['market'],
-                        'price': row['price'],
-                        'match_type': 'name',
-                        'source': 'database'
-                    })
-            
-            if len(results) >= limit:
-                return results[:limit]
-            
-            # 4. 拼音匹配
-            cursor.execute('''
-                SELECT * FROM stocks WHERE LOWER(pinyin) LIKE ? LIMIT ?
-            ''', (f'{query}%', limit - len(results)))
-            for row in cursor.fetchall():
-                if not any(r['code'] == row['code'] for r in results):
-                    results.append({
-                        'code': row['code'],
-                        'name': row['name'],
-                        'pinyin': row['pinyin'],
-                        'market': row['market'],
-                        'price': row['price'],
-                        'match_type': 'pinyin',
-                        'source': 'database'
-                    })
-            
-            return results[:limit]
+                }
+                for row in cursor.fetchall()
+            ]
             
         except Exception as e:
             print(f"数据库搜索错误: {e}")
             return []
-        finally:
-            if conn:
-                conn.close()
     
     def get_stock_info(self, code: str) -> Optional[Dict]:
         """获取股票详细信息"""
@@ -429,7 +614,7 @@ class StockDatabase:
         
         try:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM stocks WHERE code = ?', (code,))
+            cursor.execute(_Q_STOCK_INFO, (code,))
             row = cursor.fetchone()
             
             if row:
@@ -448,9 +633,6 @@ class StockDatabase:
         except Exception as e:
             print(f"数据库查询错误: {e}")
             return None
-        finally:
-            if conn:
-                conn.close()
     
     def get_stats(self) -> Dict:
         """获取数据库统计信息"""
@@ -462,14 +644,11 @@ class StockDatabase:
             cursor = conn.cursor()
             
             # 总数
-            cursor.execute('SELECT COUNT(*) FROM stocks')
+            cursor.execute(_Q_COUNT)
             total = cursor.fetchone()[0]
             
             # 按市场分布
-            cursor.execute('''
-                SELECT market, COUNT(*) FROM stocks 
-                GROUP BY market ORDER BY COUNT(*) DESC
-            ''')
+            cursor.execute(_Q_COUNT_BY_MARKET)
             by_market = dict(cursor.fetchall())
             
             return {
@@ -480,13 +659,13 @@ class StockDatabase:
         except Exception as e:
             print(f"数据库统计错误: {e}")
             return {'total': 0, 'by_market': {}}
-        finally:
-            if conn:
-                conn.close()
     
     def close(self):
-        """关闭连接（已不需要，每次使用后自动关闭）"""
-        pass
+        """关闭当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
 
 # 全局数据库实例
 _stock_db = None
@@ -5,52 +5,189 @@ A股全市场股票搜索引擎
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import hashlib
 import json
+import os
 import re
+from operator import itemgetter
 from typing import List, Dict, Optional
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 
+# 接口返回的JSON和缓存快照用orjson解析/序列化（C实现），未安装时回退到标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+# 拼音首字母转换：优先使用专业拼音工具，缺失时使用备用简单映射
+try:
+    from moyan.config.pinyin_helper import get_pinyin_initial as _pinyin_initial
+except ImportError:
+    @lru_cache(maxsize=8192)
+    def _fallback_char_initial(char: str) -> str:
+        """单个字符的备用首字母（按字符缓存）"""
+        if '\u4e00' <= char <= '\u9fff':  # 中文字符
+            # 简单映射规则
+            return chr(ord('a') + (ord(char) % 26))
+        if char.isalpha():
+            return char.lower()
+        return ''
+    
+    def _pinyin_initial(text: str) -> str:
+        return ''.join(map(_fallback_char_initial, text))
+
+@lru_cache(maxsize=50000)
+def _get_pinyin_initial(chinese_text: str) -> str:
+    """
+    获取中文拼音首字母（使用专业拼音工具，按名称缓存）
+    """
+    return _pinyin_initial(chinese_text)
+
+# 代码首位 -> 市场类型
+_MARKET_BY_FIRST_CHAR = {'6': '沪A', '0': '深A', '3': '创业板'}
+
+# 搜索结果的匹配类型优先级，数值越小越靠前
+_MATCH_PRIORITY = {
+    'local_code': 1, 'local_pinyin': 2, 'code': 3, 'pinyin': 4,
+    'local_code_prefix': 5, 'code_prefix': 6, 'local_name': 7, 'name': 8,
+    'local_pinyin_prefix': 9, 'pinyin_prefix': 10
+}
+
+class _TrieNode:
+    """
+    前缀树节点
+    
+    ids 为经过该节点（即以该前缀开头）的所有股票序号，exact 为恰好在该节点结束的股票序号，
+    两者均按股票在缓存中的顺序升序排列
+    """
+    __slots__ = ('children', 'ids', 'exact')
+    
+    def __init__(self):
+        self.children = {}
+        self.ids = []
+        self.exact = []
+    
+    def insert(self, key: str, idx: int):
+        """插入一个键；同一股票须按序号递增插入，其多个键连续插入时自动去重"""
+        node = self
+        for char in key:
+            if not node.ids or node.ids[-1] != idx:
+                node.ids.append(idx)
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            node = child
+        if not node.ids or node.ids[-1] != idx:
+            node.ids.append(idx)
+        if not node.exact or node.exact[-1] != idx:
+            node.exact.append(idx)
+    
+    def find(self, key: str) -> Optional['_TrieNode']:
+        """沿键逐字符下降，返回对应节点，不存在时返回None"""
+        node = self
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+# 股票缓存快照的默认保存位置；快照为JSON格式（记录都是普通字典），读取时不会执行任何代码
+DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.moyan', 'stock_cache.json')
+# 快照格式版本，记录字段变化时递增，版本不符的旧快照直接丢弃
+CACHE_SNAPSHOT_VERSION = 1
+
 class AStockSearchEngine:
     """A股全市场搜索引擎"""
     
-    def __init__(self):
+    def __init__(self, cache_file: Optional[str] = DEFAULT_CACHE_FILE):
+        """
+        Args:
+            cache_file: 股票缓存快照文件路径，为None时不读写磁盘快照
+        """
         self.stock_cache = {}
         self.last_update = 0
         self.cache_ttl = 86400  # 24小时缓存
         self.lock = threading.Lock()
+        self.cache_file = cache_file
         
         # 东财API配置
         self.eastmoney_api = "http://80.push2.eastmoney.com/api/qt/clist/get"
         
-        # 拼音映射缓存
-        self.pinyin_cache = {}
+        # 所有请求共用一个会话，复用TCP连接；连接池容量覆盖并发请求数
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16, pool_maxsize=16,
+            max_retries=Retry(total=2, backoff_factor=0.3)
+        )
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
         
-    def _get_pinyin_initial(self, chinese_text: str) -> str:
-        """
-        获取中文拼音首字母（使用专业拼音工具）
-        """
-        if chinese_text in self.pinyin_cache:
-            return self.pinyin_cache[chinese_text]
+        # 各策略上次成功响应的校验信息与解析结果：
+        # 策略名 -> {'etag', 'last_modified', 'digest', 'stocks'}
+        self._strategy_responses = {}
+        
+        # 上次进程保存的快照仍在有效期内时直接使用，启动后的首次查询无需联网
+        self._load_cache_snapshot()
+        
+        # 搜索索引：(对应的缓存字典, 按缓存顺序排列的股票代码/小写名称/小写拼音平行列表,
+        # 代码前缀树, 名称后缀前缀树, 拼音前缀树)
+        self._search_index = self._build_search_index(self.stock_cache)
+    
+    def _load_cache_snapshot(self):
+        """从磁盘快照恢复股票缓存，快照已过期时忽略，损坏或格式版本不符时删除"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
         
         try:
-            from moyan.config.pinyin_helper import get_pinyin_initial
-            result = get_pinyin_initial(chinese_text)
-        except ImportError:
-            # 备用简单映射
-            result = ''
-            for char in chinese_text:
-                if '\u4e00' <= char <= '\u9fff':  # 中文字符
-                    # 简单映射规则
-                    unicode_val = ord(char)
-                    result += chr(ord('a') + (unicode_val % 26))
-                elif char.isalpha():
-                    result += char.lower()
+            with open(self.cache_file, 'rb') as f:
+                snapshot = _json_loads(f.read())
+            if snapshot.get('version') != CACHE_SNAPSHOT_VERSION:
+                raise ValueError(f"快照格式版本不符: {snapshot.get('version')}")
+            stock_cache = snapshot['stocks']
+            last_update = float(snapshot['last_update'])
+            if not isinstance(stock_cache, dict) or not all(isinstance(v, dict) for v in stock_cache.values()):
+                raise ValueError("快照内容格式错误")
+        except Exception as e:
+            print(f"⚠️ 股票缓存快照无效，已丢弃: {e}")
+            try:
+                os.remove(self.cache_file)
+            except OSError:
+                pass
+            return
         
-        self.pinyin_cache[chinese_text] = result
-        return result
+        if stock_cache and time.time() - last_update <= self.cache_ttl:
+            self.stock_cache = stock_cache
+            self.last_update = last_update
+            print(f"💾 使用本地股票缓存快照: {len(stock_cache)} 只")
     
+    def _save_cache_snapshot(self):
+        """将当前股票缓存写入磁盘快照（先写临时文件再替换，避免留下半个文件）"""
+        if not self.cache_file:
+            return
+        
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(_json_dumps({
+                    'version': CACHE_SNAPSHOT_VERSION,
+                    'last_update': self.last_update,
+                    'stocks': self.stock_cache,
+                }))
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"⚠️ 写入股票缓存快照失败: {e}")
+        
     def _fetch_all_stocks(self) -> Dict:
         """
         从东财API获取全部A股数据（分批获取）
@@ -146,41 +283,15 @@ class AStockSearchEngine:
         
         print(f"使用 {len(strategies)} 个优化策略获取A股数据")
         
-        for strategy in strategies:
-            try:
-                print(f"正在获取{strategy['name']}数据...")
-                
-                params = {
-                    'pn': strategy.get('pn', '1'),
-                    'pz': strategy['pz'],
-                    'po': '1',
-                    'np': '1',
-                    'ut': 'bd1d9ddb04089700cf9c27f6f7426281',
-                    'fltt': '2',
-                    'invt': '2',
-                    'fid': strategy['fid'],
-                    'fs': strategy['fs'],
-                    'fields': 'f12,f14,f2,f3,f20,f5'  # 代码,名称,价格,涨跌幅,市值,成交量
-                }
-                
-                response = requests.get(self.eastmoney_api, params=params, timeout=15)
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get('data') and data['data'].get('diff'):
-                        batch_stocks = self._parse_eastmoney_data(data['data']['diff'])
-                        # 合并数据，避免重复
-                        for code, info in batch_stocks.items():
-                            if code not in all_stocks:
-                                all_stocks[code] = info
-                        print(f"  ✅ {strategy['name']}: 新增 {len(batch_stocks)} 只，总计 {len(all_stocks)} 只")
-                    else:
-                        print(f"  ❌ {strategy['name']}: 无数据返回")
-                else:
-                    print(f"  ❌ {strategy['name']}: HTTP {response.status_code}")
-                    
-            except Exception as e:
-                print(f"  ❌ {strategy['name']}获取失败: {e}")
-                continue
+        # 各策略的请求相互独立，并发执行；结果按策略原顺序合并，去重结果与逐个请求时一致
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for strategy, batch_stocks in zip(strategies, executor.map(self._fetch_one_strategy, strategies)):
+                if batch_stocks:
+                    # 合并数据，避免重复
+                    for code, info in batch_stocks.items():
+                        if code not in all_stocks:
+                            all_stocks[code] = info
+                    print(f"  ✅ {strategy['name']}: 新增 {len(batch_stocks)} 只，总计 {len(all_stocks)} 只")
         
         if len(all_stocks) > 0:
             print(f"🎉 成功获取 {len(all_stocks)} 只A股数据")
@@ -189,31 +300,90 @@ class AStockSearchEngine:
             print("⚠️ 所有API策略都失败，使用本地数据库")
             return self._get_fallback_stocks()
     
+    def _fetch_one_strategy(self, strategy: Dict) -> Dict:
+        """
+        按单个策略请求一页数据并解析，失败时返回空字典
+        """
+        try:
+            print(f"正在获取{strategy['name']}数据...")
+            
+            params = {
+                'pn': strategy.get('pn', '1'),
+                'pz': strategy['pz'],
+                'po': '1',
+                'np': '1',
+                'ut': 'bd1d9ddb04089700cf9c27f6f7426281',
+                'fltt': '2',
+                'invt': '2',
+                'fid': strategy['fid'],
+                'fs': strategy['fs'],
+                'fields': 'f12,f14,f2,f3,f20,f5'  # 代码,名称,价格,涨跌幅,市值,成交量
+            }
+            
+            # 带上次响应的校验信息做条件请求，数据未变化时服务端可直接返回304
+            previous = self._strategy_responses.get(strategy['name'])
+            headers = {}
+            if previous and previous['etag']:
+                headers['If-None-Match'] = previous['etag']
+            if previous and previous['last_modified']:
+                headers['If-Modified-Since'] = previous['last_modified']
+            
+            response = self._session.get(self.eastmoney_api, params=params, headers=headers, timeout=15)
+            if response.status_code == 304 and previous:
+                return previous['stocks']
+            if response.status_code == 200:
+                # 服务端不支持条件请求时，响应体与上次完全相同也直接复用上次的解析结果
+                digest = hashlib.blake2b(response.content, digest_size=16).digest()
+                if previous and previous['digest'] == digest:
+                    return previous['stocks']
+                
+                data = _json_loads(response.content)
+                if data.get('data') and data['data'].get('diff'):
+                    stocks = self._parse_eastmoney_data(data['data']['diff'])
+                    self._strategy_responses[strategy['name']] = {
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                        'digest': digest,
+                        'stocks': stocks,
+                    }
+                    return stocks
+                print(f"  ❌ {strategy['name']}: 无数据返回")
+            else:
+                print(f"  ❌ {strategy['name']}: HTTP {response.status_code}")
+                
+        except Exception as e:
+            print(f"  ❌ {strategy['name']}获取失败: {e}")
+        return {}
+    
     def _parse_eastmoney_data(self, stocks_data: List) -> Dict:
         """
         解析东财API返回的股票数据
         """
         stocks = {}
         
-        for stock in stocks_data:
-            try:
-                code = stock.get('f12', '')  # 股票代码
-                name = stock.get('f14', '')  # 股票名称
-                
-                if code and name:
-                    # 生成拼音首字母
-                    pinyin = self._get_pinyin_initial(name)
-                    
-                    stocks[code] = {
-                        'name': name,
-                        'pinyin': pinyin,
-                        'full_pinyin': pinyin,  # 简化版本
-                        'price': stock.get('f2', 0),  # 当前价格
-                        'change': stock.get('f3', 0),  # 涨跌幅
-                        'market': '沪A' if code.startswith('6') else '深A' if code.startswith('0') else '创业板' if code.startswith('3') else '其他'
-                    }
-            except Exception as e:
-                continue
+        # 先筛出有代码和名称的记录，再为每个不同的名称只生成一次拼音首字母
+        valid_stocks = [
+            stock for stock in stocks_data
+            if isinstance(stock, dict) and stock.get('f12') and stock.get('f14')
+        ]
+        pinyin_map = {
+            name: _get_pinyin_initial(name)
+            for name in {stock['f14'] for stock in valid_stocks}
+        }
+        
+        for stock in valid_stocks:
+            code = stock['f12']  # 股票代码
+            name = stock['f14']  # 股票名称
+            pinyin = pinyin_map[name]
+            
+            stocks[code] = {
+                'name': name,
+                'pinyin': pinyin,
+                'full_pinyin': pinyin,  # 简化版本
+                'price': stock.get('f2', 0),  # 当前价格
+                'change': stock.get('f3', 0),  # 涨跌幅
+                'market': _MARKET_BY_FIRST_CHAR.get(code[:1], '其他')
+            }
         
         print(f"成功获取 {len(stocks)} 只股票数据")
         return stocks
@@ -233,7 +403,7 @@ class AStockSearchEngine:
                     'full_pinyin': info.get('full_pinyin', info['pinyin']),
                     'price': 0,  # 没有实时价格
                     'change': 0,
-                    'market': '沪A' if code.startswith('6') else '深A' if code.startswith('0') else '创业板' if code.startswith('3') else '其他'
+                    'market': _MARKET_BY_FIRST_CHAR.get(code[:1], '其他')
                 }
             
             print(f"加载本地数据库: {len(fallback_stocks)} 只股票")
@@ -247,15 +417,53 @@ class AStockSearchEngine:
         """
         更新股票缓存
         """
+        # 缓存未过期时直接返回，不争用锁；每次查询都会调用这里
+        if time.time() - self.last_update <= self.cache_ttl:
+            return
+        
         with self.lock:
+            # 加锁后再检查一次：等锁期间其他线程可能已完成更新
             current_time = time.time()
             if current_time - self.last_update > self.cache_ttl:
                 print("正在更新股票数据...")
                 new_data = self._fetch_all_stocks()
-                if new_data:
-                    self.stock_cache.update(new_data)
+                if new_data and all(self.stock_cache.get(code) is info for code, info in new_data.items()):
+                    # 各策略的数据均未变化（复用了上次的解析结果），缓存和索引无需重建
+                    self.last_update = current_time
+                    print("股票数据未变化")
+                    self._save_cache_snapshot()
+                elif new_data:
+                    # 写时复制：在新字典上合并并建好索引后整体替换引用，
+                    # 无锁读取的线程看到的始终是完整的旧快照或新快照
+                    new_cache = dict(self.stock_cache)
+                    new_cache.update(new_data)
+                    self._search_index = self._build_search_index(new_cache)
+                    self.stock_cache = new_cache
                     self.last_update = current_time
                     print(f"股票数据更新完成，共 {len(self.stock_cache)} 只")
+                    self._save_cache_snapshot()
+    
+    def _build_search_index(self, stock_cache: Dict):
+        """
+        按缓存顺序为代码、名称、拼音构建前缀树
+        
+        名称插入全部后缀，任意子串都对应后缀树中的一个前缀；节点上的序号列表即为匹配的股票，
+        查询只需沿查询串下降，无需遍历整个缓存。小写名称和拼音在此一次算好，按序号存放，
+        查询时判断匹配类型不再重复调用 lower()
+        """
+        codes = list(stock_cache)
+        names_lc = [stock_cache[code]['name'].lower() for code in codes]
+        pinyins_lc = [stock_cache[code]['pinyin'].lower() for code in codes]
+        code_trie, name_trie, pinyin_trie = _TrieNode(), _TrieNode(), _TrieNode()
+        
+        for idx, code in enumerate(codes):
+            code_trie.insert(code, idx)
+            name = names_lc[idx]
+            for start in range(len(name)):
+                name_trie.insert(name[start:], idx)
+            pinyin_trie.insert(pinyins_lc[idx], idx)
+        
+        return stock_cache, codes, names_lc, pinyins_lc, code_trie, name_trie, pinyin_trie
     
     def get_stock_info(self, code: str) -> Optional[Dict]:
         """
@@ -276,6 +484,7 @@ class AStockSearchEngine:
         self.update_stock_cache()
         
         query = query.strip().lower()
+        # (匹配优先级, 结果)：优先级在确定匹配类型时一并给出，排序时无需再查表
         results = []
         
         # 首先从本地数据库搜索（常用股票，更准确）
@@ -285,45 +494,70 @@ class AStockSearchEngine:
             local_results = local_search(query)
             for result in local_results[:5]:  # 本地结果优先，但限制数量
                 local_codes.add(result['code'])
-                results.append({
+                match_type = f"local_{result['match_type']}"
+                results.append((_MATCH_PRIORITY.get(match_type, 20), {
                     'code': result['code'],
                     'name': result['name'],
                     'pinyin': result['pinyin'],
-                    'match_type': f"local_{result['match_type']}",
+                    'match_type': match_type,
                     'source': 'local'
-                })
+                }))
         except ImportError:
             pass
         
-        # 然后搜索全市场数据
-        for code, info in self.stock_cache.items():
-            if len(results) >= limit:
-                break
-                
-            # 避免重复（本地已有的跳过）
-            if code in local_codes:
-                continue
-            
-            match_type = None
-            
+        # 然后搜索全市场数据：按匹配优先级从高到低依次取各前缀树节点上的候选股票，
+        # 全市场结果凑满 limit 条即停止，高优先级的匹配不会因为在缓存中靠后而被低优先级的挤掉；
+        # 本地结果不占这 limit 条名额，否则优先级较低的本地结果会把优先级更高的全市场结果挤掉
+        stock_cache, codes, names_lc, pinyins_lc, code_trie, name_trie, pinyin_trie = self._search_index
+        code_node = code_trie.find(query)
+        name_node = name_trie.find(query)
+        pinyin_node = pinyin_trie.find(query)
+        # 前缀匹配对查询长度的要求与具体股票无关，只判断一次
+        check_code_prefix = len(query) >= 3
+        check_pinyin_prefix = len(query) >= 2
+        
+        def classify(idx: int) -> Optional[str]:
+            """按原有判定顺序确定匹配类型，每只股票只属于其中一类"""
+            code = codes[idx]
+            pinyin_lc = pinyins_lc[idx]
             # 1. 精确匹配股票代码
             if query == code:
-                match_type = 'code'
+                return 'code'
             # 2. 代码前缀匹配
-            elif code.startswith(query) and len(query) >= 3:
-                match_type = 'code_prefix'
+            if check_code_prefix and code.startswith(query):
+                return 'code_prefix'
             # 3. 股票名称包含匹配
-            elif query in info['name'].lower():
-                match_type = 'name'
+            if query in names_lc[idx]:
+                return 'name'
             # 4. 拼音首字母匹配
-            elif query == info['pinyin'].lower():
-                match_type = 'pinyin'
+            if query == pinyin_lc:
+                return 'pinyin'
             # 5. 拼音首字母前缀匹配
-            elif info['pinyin'].lower().startswith(query) and len(query) >= 2:
-                match_type = 'pinyin_prefix'
-            
-            if match_type:
-                results.append({
+            if check_pinyin_prefix and pinyin_lc.startswith(query):
+                return 'pinyin_prefix'
+            return None
+        
+        # (匹配类型, 优先级, 候选序号)，按优先级排列；候选中归属其他类型的股票会在对应的那一类中取到
+        tiers = (
+            ('code', 3, code_node.exact if code_node else ()),
+            ('pinyin', 4, pinyin_node.exact if pinyin_node else ()),
+            ('code_prefix', 6, code_node.ids if code_node and check_code_prefix else ()),
+            ('name', 8, name_node.ids if name_node else ()),
+            ('pinyin_prefix', 10, pinyin_node.ids if pinyin_node and check_pinyin_prefix else ()),
+        )
+        
+        market_count = 0
+        for match_type, rank, candidates in tiers:
+            for idx in candidates:
+                if market_count >= limit:
+                    break
+                code = codes[idx]
+                # 避免重复（本地已有的跳过）
+                if code in local_codes or classify(idx) != match_type:
+                    continue
+                
+                info = stock_cache[code]
+                results.append((rank, {
                     'code': code,
                     'name': info['name'],
                     'pinyin': info['pinyin'],
@@ -332,18 +566,13 @@ class AStockSearchEngine:
                     'price': info.get('price', 0),
                     'change': info.get('change', 0),
                     'market': info.get('market', '')
-                })
-        
-        # 按匹配优先级排序
-        priority = {
-            'local_code': 1, 'local_pinyin': 2, 'code': 3, 'pinyin': 4,
-            'local_code_prefix': 5, 'code_prefix': 6, 'local_name': 7, 'name': 8,
-            'local_pinyin_prefix': 9, 'pinyin_prefix': 10
-        }
+                }))
+                market_count += 1
         
-        results.sort(key=lambda x: priority.get(x['match_type'], 20))
+        # 合并后按匹配优先级排序（稳定排序，同优先级保持原顺序）
+        results.sort(key=itemgetter(0))
         
-        return results[:limit]
+        return [result for _, result in results[:limit]]
 
 # 全局搜索引擎实例
 _search_engine = None
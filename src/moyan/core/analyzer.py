@@ -5,6 +5,7 @@ Moyan系统的主要分析接口，封装了CZSC核心库的功能
 """
 
 from typing import Optional, Dict, Any, List
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import warnings
 
@@ -30,6 +31,9 @@ class MoyanAnalyzer:
     基于CZSC核心库的高级分析接口，提供完整的缠论分析功能
     """
     
+    # 分析结果缓存的最大条目数，超出时淘汰最久未使用的结果
+    CACHE_MAX_SIZE = 128
+    
     def __init__(self, 
                  kline_level: Optional[str] = None,
                  config: Optional[Any] = None):
@@ -54,8 +58,8 @@ class MoyanAnalyzer:
         # 初始化内部分析器
         self._auto_analyzer = AutoAnalyzer(kline_level=self.kline_level, output_base_dir="./output")
         
-        # 分析结果缓存
-        self._analysis_cache = {}
+        # 分析结果缓存（LRU，按最近使用顺序排列）
+        self._analysis_cache = OrderedDict()
         
         print(f"✅ 墨岩分析器已初始化")
         print(f"📈 K线级别: {self.kline_config['name']} ({self.kline_level})")
@@ -66,7 +70,8 @@ class MoyanAnalyzer:
                 start_date: Optional[str] = None,
                 end_date: Optional[str] = None,
                 days: Optional[int] = None,
-                force_refresh: bool = False) -> Dict[str, Any]:
+                force_refresh: bool = False,
+                generate_chart: bool = True) -> Dict[str, Any]:
         """
         分析股票
         
@@ -76,16 +81,18 @@ class MoyanAnalyzer:
             end_date: 结束日期 (YYYYMMDD)  
             days: 获取天数
             force_refresh: 是否强制刷新缓存
+            generate_chart: 是否生成可视化图表
             
         Returns:
             dict: 分析结果
         """
         # 生成缓存键
-        cache_key = f"{stock_code}_{self.kline_level}_{start_date}_{end_date}_{days}"
+        cache_key = (stock_code, self.kline_level, start_date, end_date, days, generate_chart)
         
         # 检查缓存
         if not force_refresh and cache_key in self._analysis_cache:
             print(f"📋 使用缓存的分析结果: {stock_code}")
+            self._analysis_cache.move_to_end(cache_key)
             return self._analysis_cache[cache_key]
         
         print(f"🚀 开始分析股票: {stock_code}")
@@ -97,61 +104,83 @@ class MoyanAnalyzer:
                 stock_code=stock_code,
                 start_date=start_date,
                 end_date=end_date,
-                days=days
+                days=days,
+                generate_chart=generate_chart
             )
             
             if not success:
                 raise RuntimeError("分析失败")
             
-            # 获取实际生成的文件路径
-            chart_path = getattr(self._auto_analyzer, 'last_chart_path', None)
-            report_path = getattr(self._auto_analyzer, 'last_report_path', None)
-            
-            # 构建分析结果
-            result = {
-                'stock_code': stock_code,
-                'kline_level': self.kline_level,
-                'kline_name': self.kline_config['name'],
-                'analysis_time': datetime.now().isoformat(),
-                'success': True,
-                'data': self._auto_analyzer.analysis_result,
-                'charts': {
-                    'main_chart': chart_path,
-                },
-                'reports': {
-                    'markdown': report_path,
-                }
-            }
-            
-            # 缓存结果
-            self._analysis_cache[cache_key] = result
+            result = self._build_result(stock_code, self._auto_analyzer)
+            self._cache_result(cache_key, result)
             
             print(f"✅ 分析完成: {stock_code}")
             return result
             
         except Exception as e:
-            error_result = {
-                'stock_code': stock_code,
-                'kline_level': self.kline_level,
-                'analysis_time': datetime.now().isoformat(),
-                'success': False,
-                'error': str(e),
-                'data': None,
-                'charts': None,
-                'reports': None,
-            }
             print(f"❌ 分析失败: {stock_code} - {e}")
-            return error_result
+            return self._error_result(stock_code, e)
+    
+    def _build_result(self, stock_code: str, auto_analyzer: AutoAnalyzer) -> Dict[str, Any]:
+        """根据内部分析器本次的分析结果和输出文件构建结果字典"""
+        return {
+            'stock_code': stock_code,
+            'kline_level': self.kline_level,
+            'kline_name': self.kline_config['name'],
+            'analysis_time': datetime.now().isoformat(),
+            'success': True,
+            # 内部分析器的结果字典会在下一次分析时原地更新，这里保存一份副本
+            'data': dict(auto_analyzer.analysis_result),
+            'charts': {
+                'main_chart': getattr(auto_analyzer, 'last_chart_path', None),
+            },
+            'reports': {
+                'markdown': getattr(auto_analyzer, 'last_report_path', None),
+            }
+        }
+    
+    def _error_result(self, stock_code: str, error: Any) -> Dict[str, Any]:
+        """分析失败时的结果字典"""
+        return {
+            'stock_code': stock_code,
+            'kline_level': self.kline_level,
+            'analysis_time': datetime.now().isoformat(),
+            'success': False,
+            'error': str(error),
+            'data': None,
+            'charts': None,
+            'reports': None,
+        }
+    
+    def _cache_result(self, cache_key: tuple, result: Dict[str, Any]):
+        """写入分析结果缓存，超出容量时淘汰最久未使用的结果"""
+        self._analysis_cache[cache_key] = result
+        self._analysis_cache.move_to_end(cache_key)
+        if len(self._analysis_cache) > self.CACHE_MAX_SIZE:
+            self._analysis_cache.popitem(last=False)
     
     def batch_analyze(self, 
                      stock_codes: List[str],
-                     **kwargs) -> Dict[str, Dict[str, Any]]:
+                     start_date: Optional[str] = None,
+                     end_date: Optional[str] = None,
+                     days: Optional[int] = None,
+                     force_refresh: bool = False,
+                     generate_chart: bool = True,
+                     max_workers: int = 4) -> Dict[str, Dict[str, Any]]:
         """
         批量分析股票
         
+        通过 AutoAnalyzer.batch_analyze 执行：行情数据在线程池中预先获取，
+        缠论计算和绘图按顺序进行；已有缓存结果的股票直接复用
+        
         Args:
             stock_codes: 股票代码列表
-            **kwargs: 传递给analyze方法的参数
+            start_date: 开始日期 (YYYYMMDD)
+            end_date: 结束日期 (YYYYMMDD)
+            days: 获取天数
+            force_refresh: 是否强制刷新缓存
+            generate_chart: 是否生成可视化图表
+            max_workers: 同时进行的数据请求数
             
         Returns:
             dict: {stock_code: analysis_result}
@@ -161,26 +190,44 @@ class MoyanAnalyzer:
         
         print(f"🚀 开始批量分析 {total} 只股票")
         
-        for i, stock_code in enumerate(stock_codes, 1):
-            print(f"\n📊 进度: {i}/{total} - 分析 {stock_code}")
-            
+        pending = []
+        for stock_code in stock_codes:
+            cache_key = (stock_code, self.kline_level, start_date, end_date, days, generate_chart)
+            if not force_refresh and cache_key in self._analysis_cache:
+                print(f"📋 使用缓存的分析结果: {stock_code}")
+                self._analysis_cache.move_to_end(cache_key)
+                results[stock_code] = self._analysis_cache[cache_key]
+            elif stock_code not in pending:
+                pending.append(stock_code)
+        
+        def collect(stock_code, auto_analyzer, success):
+            if success:
+                result = self._build_result(stock_code, auto_analyzer)
+                cache_key = (stock_code, self.kline_level, start_date, end_date, days, generate_chart)
+                self._cache_result(cache_key, result)
+                print(f"✅ {stock_code} 分析成功")
+            else:
+                result = self._error_result(stock_code, "分析失败")
+                print(f"❌ {stock_code} 分析失败")
+            results[stock_code] = result
+        
+        if pending:
             try:
-                result = self.analyze(stock_code, **kwargs)
-                results[stock_code] = result
-                
-                if result['success']:
-                    print(f"✅ {stock_code} 分析成功")
-                else:
-                    print(f"❌ {stock_code} 分析失败: {result.get('error', '未知错误')}")
-                    
+                AutoAnalyzer.batch_analyze(
+                    pending, start_date, end_date, days,
+                    kline_level=self.kline_level,
+                    output_base_dir=self._auto_analyzer.output_base_dir,
+                    max_workers=max_workers,
+                    generate_chart=generate_chart,
+                    on_result=collect,
+                )
             except Exception as e:
-                print(f"❌ {stock_code} 分析异常: {e}")
-                results[stock_code] = {
-                    'stock_code': stock_code,
-                    'success': False,
-                    'error': str(e)
-                }
+                print(f"❌ 批量分析异常: {e}")
+                for stock_code in pending:
+                    results.setdefault(stock_code, self._error_result(stock_code, e))
         
+        # 按输入顺序返回
+        results = {stock_code: results[stock_code] for stock_code in stock_codes}
         success_count = sum(1 for r in results.values() if r.get('success', False))
         print(f"\n🎉 批量分析完成: {success_count}/{total} 成功")
         
@@ -5,6 +5,7 @@
 """
 
 import warnings
+import threading
 import time
 import pandas as pd
 from abc import ABC, abstractmethod
@@ -231,6 +232,10 @@ class YFinanceDataSource(DataSourceBase):
         print("❌ yfinance所有重试均失败")
         return None
 
+# baostock 的 login/logout 作用于模块级的全局会话，多个线程同时获取数据会互相登出，
+# 因此一次完整的 登录-查询-登出 过程需要串行执行
+_BAOSTOCK_LOCK = threading.Lock()
+
 class BaostockDataSource(DataSourceBase):
     """Baostock数据源 - 免费的A股数据源，支持分钟级别"""
     
@@ -255,7 +260,12 @@ class BaostockDataSource(DataSourceBase):
             return False
     
     def _fetch_data(self, symbol: str, **kwargs) -> Optional[pd.DataFrame]:
-        """使用baostock获取股票数据"""
+        """使用baostock获取股票数据（全局会话，多线程调用时串行执行）"""
+        with _BAOSTOCK_LOCK:
+            return self._fetch_data_in_session(symbol, **kwargs)
+    
+    def _fetch_data_in_session(self, symbol: str, **kwargs) -> Optional[pd.DataFrame]:
+        """登录baostock、查询并登出，调用方需持有 _BAOSTOCK_LOCK"""
         try:
             # 登录baostock
             lg = self.bs.login()
@@ -984,12 +994,15 @@ DEFAULT_CONFIG = {
 
 # 全局实例
 _data_source_manager = None
+_data_source_manager_lock = threading.Lock()
 
 def get_data_source_manager(config: Optional[Dict] = None) -> MultiDataSourceManager:
-    """获取全局数据源管理器实例"""
+    """获取全局数据源管理器实例（批量分析时会在线程池中并发调用，创建过程加锁）"""
     global _data_source_manager
     if _data_source_manager is None:
-        _data_source_manager = MultiDataSourceManager(config or DEFAULT_CONFIG)
+        with _data_source_manager_lock:
+            if _data_source_manager is None:
+                _data_source_manager = MultiDataSourceManager(config or DEFAULT_CONFIG)
     return _data_source_manager
 
 if __name__ == '__main__':
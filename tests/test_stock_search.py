@@ -0,0 +1,183 @@
+"""
+股票搜索测试
+
+在小规模固定数据上测试全市场搜索的优先级排序、本地数据库搜索和缓存快照
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# 添加src目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from moyan.config import stock_database
+from moyan.config.stock_db_builder import StockDatabase, StockDatabaseBuilder
+from moyan.config.stock_search import AStockSearchEngine, CACHE_SNAPSHOT_VERSION
+
+def _record(name, pinyin):
+    return {'name': name, 'pinyin': pinyin, 'full_pinyin': '', 'price': 10.0, 'change': 0.0, 'market': '沪A'}
+
+# 全市场缓存（按缓存顺序）：拼音前缀匹配的股票排在拼音精确匹配的股票之前
+MARKET_STOCKS = {
+    '000063': _record('中兴通讯', 'zxtx'),
+    '600030': _record('中信证券', 'zx'),
+    '601998': _record('中信银行', 'zxyh'),
+    '000715': _record('中兴商业', 'zx'),
+    '600036': _record('招商银行', 'zsyh'),
+}
+
+def _make_engine(monkeypatch, local_results=()):
+    """不联网、不读写快照的搜索引擎，本地常用股票库替换为给定结果"""
+    engine = AStockSearchEngine(cache_file=None)
+    engine.stock_cache = dict(MARKET_STOCKS)
+    engine._search_index = engine._build_search_index(engine.stock_cache)
+    engine.last_update = time.time()
+    monkeypatch.setattr(stock_database, 'search_stock', lambda query: list(local_results))
+    return engine
+
+def _codes_and_types(results):
+    return [(r['code'], r['match_type']) for r in results]
+
+def test_search_priority_tiers(monkeypatch):
+    """全市场结果按匹配优先级排序，同一优先级内保持缓存顺序"""
+    engine = _make_engine(monkeypatch)
+
+    assert _codes_and_types(engine.search_stocks('zx', limit=10)) == [
+        ('600030', 'pinyin'), ('000715', 'pinyin'),
+        ('000063', 'pinyin_prefix'), ('601998', 'pinyin_prefix'),
+    ]
+    assert _codes_and_types(engine.search_stocks('6000', limit=10)) == [
+        ('600030', 'code_prefix'), ('600036', 'code_prefix'),
+    ]
+    assert _codes_and_types(engine.search_stocks('银行', limit=10)) == [
+        ('601998', 'name'), ('600036', 'name'),
+    ]
+
+def test_low_priority_local_results_do_not_crowd_out_market(monkeypatch):
+    """优先级低的本地结果不占用 limit 名额，优先级高的全市场结果不会被挤掉"""
+    local = [{'code': '300001', 'name': '特锐德', 'pinyin': 'trd', 'match_type': 'full_pinyin'}]
+    engine = _make_engine(monkeypatch, local)
+
+    assert _codes_and_types(engine.search_stocks('zx', limit=3)) == [
+        ('600030', 'pinyin'), ('000715', 'pinyin'), ('000063', 'pinyin_prefix'),
+    ]
+    results = engine.search_stocks('zx', limit=10)
+    assert _codes_and_types(results)[-1] == ('300001', 'local_full_pinyin')
+    assert results[-1]['source'] == 'local'
+
+def test_local_results_rank_above_market_and_are_deduplicated(monkeypatch):
+    """同类匹配中本地结果优先，且全市场结果中不再重复出现"""
+    local = [{'code': '600030', 'name': '中信证券', 'pinyin': 'zx', 'match_type': 'pinyin'}]
+    engine = _make_engine(monkeypatch, local)
+
+    results = engine.search_stocks('zx', limit=3)
+    assert _codes_and_types(results) == [
+        ('600030', 'local_pinyin'), ('000715', 'pinyin'), ('000063', 'pinyin_prefix'),
+    ]
+    assert [r['source'] for r in results] == ['local', 'api', 'api']
+
+# 本地数据库（写入顺序刻意打乱，结果顺序不应依赖行的存储顺序）
+DB_STOCKS = [
+    ('601398', '工商银行'),
+    ('000009', '中证601指数'),
+    ('600036', '招商银行'),
+    ('601077', '渝农商银行'),
+    ('000001', '平安银行'),
+    ('600000', '浦发银行'),
+]
+
+@pytest.fixture
+def stock_db_path(tmp_path):
+    """在临时目录中构建带trigram全文索引的小型股票数据库"""
+    db_path = str(tmp_path / 'stocks.db')
+    builder = StockDatabaseBuilder(db_path)
+    try:
+        builder.init_database()
+        builder.save_stocks_to_db([
+            {'code': code, 'name': name, 'market': '沪A主板', 'price': 1.0,
+             'market_cap': 0.0, 'industry': '', 'source': 'test'}
+            for code, name in DB_STOCKS
+        ])
+    finally:
+        builder.close()
+    return db_path
+
+def _drop_fts(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        for trigger in ('stocks_fts_ai', 'stocks_fts_ad', 'stocks_fts_au'):
+            conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        conn.execute('DROP TABLE IF EXISTS stocks_fts')
+        conn.commit()
+    finally:
+        conn.close()
+
+@pytest.mark.parametrize('with_fts', [True, False])
+def test_database_search(stock_db_path, with_fts):
+    """有无全文索引时结果一致：按 精确代码、代码前缀、名称、拼音 排序，同类按代码排序"""
+    if not with_fts:
+        _drop_fts(stock_db_path)
+    db = StockDatabase(stock_db_path)
+    try:
+        def search(query, limit=10):
+            return [(r['code'], r['match_type']) for r in db.search_stocks(query, limit)]
+
+        # 三字及以上的名称查询在有全文索引时走索引
+        assert search('商银行') == [('600036', 'name'), ('601077', 'name'), ('601398', 'name')]
+        assert db._local.has_fts is with_fts
+
+        assert search('601') == [('601077', 'code_prefix'), ('601398', 'code_prefix'), ('000009', 'name')]
+        assert search('601', limit=2) == [('601077', 'code_prefix'), ('601398', 'code_prefix')]
+        assert search('银行') == [('000001', 'name'), ('600000', 'name'), ('600036', 'name'),
+                                ('601077', 'name'), ('601398', 'name')]
+        assert search('600036') == [('600036', 'code')]
+        assert search('不存在') == []
+    finally:
+        db.close()
+
+def _write_snapshot(engine):
+    engine.stock_cache = dict(MARKET_STOCKS)
+    engine.last_update = time.time()
+    engine._save_cache_snapshot()
+
+def test_snapshot_round_trip(tmp_path):
+    """快照写入后由新的引擎实例原样读回，并据此建立搜索索引"""
+    cache_file = str(tmp_path / 'stock_cache.json')
+    _write_snapshot(AStockSearchEngine(cache_file=cache_file))
+
+    engine = AStockSearchEngine(cache_file=cache_file)
+    assert engine.stock_cache == MARKET_STOCKS
+    assert list(engine.stock_cache) == list(MARKET_STOCKS)
+    assert engine._search_index[1] == list(MARKET_STOCKS)
+
+def test_expired_snapshot_is_ignored(tmp_path):
+    """过期的快照不使用"""
+    cache_file = str(tmp_path / 'stock_cache.json')
+    writer = AStockSearchEngine(cache_file=cache_file)
+    writer.stock_cache = dict(MARKET_STOCKS)
+    writer.last_update = time.time() - writer.cache_ttl - 1
+    writer._save_cache_snapshot()
+
+    engine = AStockSearchEngine(cache_file=cache_file)
+    assert engine.stock_cache == {}
+    assert engine.last_update == 0
+
+@pytest.mark.parametrize('content', [
+    b'\x80\x04not json',
+    b'{"version": 0, "last_update": 0, "stocks": {}}',
+    b'{"version": %d, "last_update": 0, "stocks": {"600030": "x"}}' % CACHE_SNAPSHOT_VERSION,
+    b'[]',
+])
+def test_invalid_snapshot_is_discarded(tmp_path, content):
+    """损坏或格式版本不符的快照被删除，不影响引擎创建"""
+    cache_file = tmp_path / 'stock_cache.json'
+    cache_file.write_bytes(content)
+
+    engine = AStockSearchEngine(cache_file=str(cache_file))
+    assert engine.stock_cache == {}
+    assert not os.path.exists(cache_file)